@@ -4,13 +4,13 @@ import streamlit as st
 import sys
 import os
 import csv
-import tempfile
 from pathlib import Path
 from datetime import datetime, timedelta
 import io
 import pickle
 import time
 from typing import Optional
+from urllib.parse import urlparse
 import pandas as pd
 import json
 
@@ -37,15 +37,27 @@ from google.oauth2.credentials import Credentials
 try:
     # Try importing from parser directory (without src prefix)
     from src.parser.image_extractor import extract_payment_info_from_image, format_payment_details
+    from src.parser.easyocr_pool import get_easyocr_pool
+    from src.parser.tesseract_pool import get_tesseract_pool
     from src.parser.grobid_client import parse_pdf_with_grobid, extract_metadata_from_tei
-    from src.parser.email_extractor import extract_full_text, find_emails
+    from src.parser.grobid_pool import get_grobid_pool, parse_server_list
+    from src.parser.tei_cache import get_tei_cache
+    from src.parser.text_cache import get_text_cache
+    from src.parser.tei_document import TeiDocument, as_tei_document
+    from src.parser.email_extractor import find_paper_emails
     print(" All local modules imported successfully")
 except ImportError as e:
     try:
         # Fallback: try with src prefix
         from src.parser.image_extractor import extract_payment_info_from_image, format_payment_details
+        from src.parser.easyocr_pool import get_easyocr_pool
+        from src.parser.tesseract_pool import get_tesseract_pool
         from src.parser.grobid_client import parse_pdf_with_grobid, extract_metadata_from_tei
-        from src.parser.email_extractor import extract_full_text, find_emails
+        from src.parser.grobid_pool import get_grobid_pool, parse_server_list
+        from src.parser.tei_cache import get_tei_cache
+        from src.parser.text_cache import get_text_cache
+        from src.parser.tei_document import TeiDocument, as_tei_document
+        from src.parser.email_extractor import find_paper_emails
         print(" All local modules imported successfully (via src)")
     except ImportError as e2:
         st.error(f"**Failed to import local modules!** Details: {e2}")
@@ -56,13 +68,30 @@ except ImportError as e:
             return {}
         def format_payment_details(details):
             return "Payment extraction unavailable"
+        def get_easyocr_pool(*args, **kwargs):
+            return None
+        def get_tesseract_pool(*args, **kwargs):
+            return None
         def parse_pdf_with_grobid(*args, **kwargs):
             return None
+        def get_grobid_pool(*args, **kwargs):
+            return None
+        def parse_server_list(*args, **kwargs):
+            return []
+        def get_tei_cache(*args, **kwargs):
+            return None
+        def get_text_cache(*args, **kwargs):
+            return None
         def extract_metadata_from_tei(*args, **kwargs):
             return {}
-        def extract_full_text(*args, **kwargs):
-            return ""
-        def find_emails(*args, **kwargs):
+        class TeiDocument:
+            parse_error = None
+            organizations = []
+            def __init__(self, *args, **kwargs):
+                pass
+        def as_tei_document(tei, *args, **kwargs):
+            return tei if isinstance(tei, TeiDocument) else TeiDocument()
+        def find_paper_emails(*args, **kwargs):
             return []
         
 # ----------------- ENVIRONMENT DETECTION (Must be before CONFIG) -----------------
@@ -87,6 +116,14 @@ def is_production():
 # ----------------- CONFIG -----------------
 st.set_page_config(page_title="Research Paper Submission", page_icon="", layout="wide")
 
+# Receipt OCR with EasyOCR (Tesseract otherwise). Its models load once per
+# process, in the background at startup, instead of on every receipt.
+USE_EASYOCR = os.getenv("USE_EASYOCR", "0") == "1"
+if USE_EASYOCR and get_easyocr_pool() is not None:
+    get_easyocr_pool().warm_up(background=True)
+if get_tesseract_pool() is not None:
+    get_tesseract_pool().warm_up(background=True)
+
 
 def apply_custom_theme():
     """Apply Google Forms-inspired compact theme with white and orange colors"""
@@ -708,6 +745,22 @@ SHEET_ID = os.getenv("GOOGLE_SHEET_ID", "")
 # Email Configuration
 SUBMISSION_DRIVE_EMAIL = os.getenv("SUBMISSION_DRIVE_EMAIL", "")
 
+# GROBID servers (comma-separated; local replicas + hosted fallback)
+GROBID_SERVERS = os.getenv("GROBID_SERVERS", "https://kermitt2-grobid.hf.space")
+
+
+def normalize_grobid_servers(value: str) -> Optional[str]:
+    """
+    The GROBID server setting as a clean comma-separated list, or None if
+    it is empty or any entry is not an http(s) URL.
+    """
+    servers = parse_server_list(value or "")
+    for server in servers:
+        url = urlparse(server)
+        if url.scheme not in ('http', 'https') or not url.netloc:
+            return None
+    return ','.join(servers) or None
+
 # Headless mode configuration
 HEADLESS = os.getenv("HEADLESS", "true").lower() == "true"
 
@@ -727,7 +780,7 @@ def init_session_state():
         'extracted': False,
         'admin_authenticated': False,
         'show_success': False,
-        'grobid_server': "https://kermitt2-grobid.hf.space",
+        'grobid_server': GROBID_SERVERS,
         'google_creds': None,
         'payment_details': {},
         'token_expiry_date': None,
@@ -1455,14 +1508,18 @@ def upload_complete_submission(creds, pdf_file, word_file, image_file, submissio
         return None
 
 # ----------------- UTILITIES -----------------
-def extract_affiliations_from_tei(tei_xml: str) -> list:
+def extract_affiliations_from_tei(tei) -> list:
+    """
+    Organization names from TEI XML or an already parsed TeiDocument: the
+    first orgName of every affiliation in the document, without duplicates
+    (in no particular order). TeiDocument.organizations gives the authors'
+    organizations in order instead.
+    """
     try:
-        from xml.etree import ElementTree as ET
-        root = ET.fromstring(tei_xml)
-        ns = {'tei': 'http://www.tei-c.org/ns/1.0'}
+        tei_ns = '{http://www.tei-c.org/ns/1.0}'
         affiliations = []
-        for affil in root.findall('.//tei:affiliation', ns):
-            org_name = affil.find('.//tei:orgName', ns)
+        for affil in as_tei_document(tei).root.iter(tei_ns + 'affiliation'):
+            org_name = next(affil.iter(tei_ns + 'orgName'), None)
             if org_name is not None and org_name.text:
                 affiliations.append(org_name.text)
         return list(set(affiliations))
@@ -1634,10 +1691,28 @@ GOOGLE_DRIVE_FOLDER_ID: {' Set' if GOOGLE_DRIVE_FOLDER_ID else ' Missing'}
 
         st.markdown("---")
         st.subheader(" Settings")
-        st.session_state.grobid_server = st.text_input(
-            "GROBID Server",
-            value=st.session_state.grobid_server
-        )
+        # Applied as a whole, so half-typed values never build a pool
+        with st.form("grobid_settings"):
+            grobid_setting = st.text_input(
+                "GROBID Server(s)",
+                value=st.session_state.grobid_server,
+                help="Comma-separated list; requests go to the healthiest server"
+            )
+            apply_grobid = st.form_submit_button("Apply")
+        if apply_grobid:
+            servers = normalize_grobid_servers(grobid_setting)
+            if servers is None:
+                st.error(" Enter one or more http(s) URLs, separated by commas. Keeping the previous servers.")
+            else:
+                st.session_state.grobid_server = servers
+        try:
+            grobid_pool = get_grobid_pool(st.session_state.grobid_server)
+        except ValueError as e:
+            st.error(f" GROBID servers not configured: {e}")
+            grobid_pool = None
+        if grobid_pool is not None:
+            with st.expander(" GROBID Endpoint Health"):
+                st.dataframe(pd.DataFrame(grobid_pool.health()), use_container_width=True)
 
 # ----------------- MAIN UI -----------------
 # Conference information box at the top
@@ -1708,13 +1783,21 @@ if uploaded_pdf and uploaded_image:
     
     with col_extract[0]:
         if st.button(" Auto-Fill from PDF", type="primary", use_container_width=True, key="autofill_pdf"):
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                tmp.write(uploaded_pdf.getvalue())
-                tmp_path = tmp.name
+            # Zero-copy view of the upload: no temp file, no extra copy per session
+            pdf_buffer = uploaded_pdf.getbuffer()
             try:
                 with st.spinner(" Extracting metadata from PDF..."):
                     # Parse with GROBID
-                    tei_xml = parse_pdf_with_grobid(tmp_path, st.session_state.grobid_server)
+                    # Shared endpoint pool: parallel sessions reuse warm connections and
+                    # are routed to the healthiest GROBID server.
+                    # Re-uploads of the same paper are served from the TEI cache.
+                    tei_xml = parse_pdf_with_grobid(
+                        pdf_buffer,
+                        st.session_state.grobid_server,
+                        client=get_grobid_pool(st.session_state.grobid_server),
+                        cache=get_tei_cache(),
+                        header_only=True  # autofill only needs front-matter fields
+                    )
                     
                     if not tei_xml:
                         raise ValueError("GROBID returned empty response. Server might be down.")
@@ -1731,40 +1814,18 @@ if uploaded_pdf and uploaded_image:
                                     "text/xml"
                                 )
                     
+                    # Parse once; metadata and affiliations share the tree
+                    tei_doc = TeiDocument(tei_xml, header_only=True)
+                    if tei_doc.parse_error is not None:
+                        raise ValueError(f"GROBID returned malformed TEI XML: {tei_doc.parse_error}")
+
                     # Extract metadata with debug mode
-                    metadata = extract_metadata_from_tei(tei_xml, debug=True)
-                    
-                    #  FIXED: Properly extract ONLY organization names from affiliations
-                    from xml.etree import ElementTree as ET
-                    root = ET.fromstring(tei_xml)
-                    ns = {'tei': 'http://www.tei-c.org/ns/1.0'}
-
-                    # Clear any badly formatted affiliations from extract_metadata_from_tei
-                    affil_list = []
-
-                    # Method 1: Try to get from author affiliations first (most reliable)
-                    authors_found = False
-                    for author in root.findall('.//tei:author', ns):
-                        authors_found = True
-                        for affil in author.findall('.//tei:affiliation', ns):
-                            # Get all orgName elements within this affiliation
-                            org_names = affil.findall('.//tei:orgName', ns)
-                            for org in org_names:
-                                if org.text and org.text.strip():
-                                    clean_name = org.text.strip()
-                                    # Avoid duplicates
-                                    if clean_name not in affil_list:
-                                        affil_list.append(clean_name)
-
-                    # Method 2: If no author affiliations, try standalone affiliations
-                    if not affil_list:
-                        for affil in root.findall('.//tei:affiliation', ns):
-                            org_names = affil.findall('.//tei:orgName', ns)
-                            for org in org_names:
-                                if org.text and org.text.strip():
-                                    clean_name = org.text.strip()
-                                    if clean_name not in affil_list:
-                                        affil_list.append(clean_name)
+                    metadata = extract_metadata_from_tei(tei_doc, debug=True)
+
+                    # Organization names of the authors' affiliations (all
+                    # affiliations if the authors have none), not the raw
+                    # affiliation text extract_metadata_from_tei falls back to
+                    affil_list = list(tei_doc.organizations)
 
                     # IMPORTANT: Override the affiliations from extract_metadata_from_tei
                     metadata['affiliations'] = affil_list
@@ -1774,9 +1835,12 @@ if uploaded_pdf and uploaded_image:
                         st.info(f" Debug: Found {len(affil_list)} affiliations")
                         if affil_list:
                             st.code("; ".join(affil_list))
-                    
-                    # Extract emails from PDF text
-                    metadata['emails'] = find_emails(extract_full_text(tmp_path))
+                        for linked in tei_doc.author_affiliations:
+                            st.text(f"{linked['name']}: {'; '.join(linked['affiliations']) or '-'}")
+
+                    # Author emails from the TEI; the PDF is only re-read if it has none
+                    # (and its text is reused on the next click for the same upload)
+                    metadata['emails'] = find_paper_emails(pdf_buffer, tei_doc, cache=get_text_cache())
                     
                     # Store in session state
                     st.session_state.metadata = metadata
@@ -1859,9 +1923,6 @@ if uploaded_pdf and uploaded_image:
                         'affiliations': [],
                         'emails': []
                     }
-            finally:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
     
     with col_extract[1]:
         if st.button(" Extract from Receipt", type="primary", use_container_width=True, key="extract_payment"):
@@ -1871,7 +1932,7 @@ if uploaded_pdf and uploaded_image:
                     payment_details = extract_payment_info_from_image(
                         uploaded_image,
                         use_tesseract=True,
-                        use_easyocr=False
+                        use_easyocr=USE_EASYOCR
                     )
                     st.session_state.payment_details = payment_details
                     
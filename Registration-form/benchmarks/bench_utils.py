@@ -0,0 +1,55 @@
+"""
+Shared helpers for the benchmark scripts: timing and percentile summaries.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+# Make `src.*` importable when a benchmark is run as a script
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100) of a list of samples."""
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Count, mean and p50/p90/p99/max of latency samples (seconds)."""
+    return {
+        'count': len(samples),
+        'mean': sum(samples) / len(samples) if samples else float('nan'),
+        'p50': percentile(samples, 50),
+        'p90': percentile(samples, 90),
+        'p99': percentile(samples, 99),
+        'max': max(samples) if samples else float('nan'),
+    }
+
+
+@contextmanager
+def timed(timings: Dict[str, List[float]], stage: str):
+    """Append the wall time of the block (seconds) to timings[stage]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.setdefault(stage, []).append(time.perf_counter() - start)
+
+
+def print_table(rows: Dict[str, Dict[str, float]], unit: str = 'ms'):
+    """Print per-stage summaries as an aligned table."""
+    scale = {'ms': 1000.0, 'us': 1e6, 's': 1.0}[unit]
+    print(f"{'stage':<24}{'n':>6}{'mean':>11}{'p50':>11}{'p90':>11}{'p99':>11}{'max':>11}  ({unit})")
+    for stage, stats in rows.items():
+        print(
+            f"{stage:<24}{stats['count']:>6}"
+            + ''.join(f"{stats[k] * scale:>11.2f}" for k in ('mean', 'p50', 'p90', 'p99', 'max'))
+        )
@@ -0,0 +1,147 @@
+"""
+Benchmark PDF text extraction and email search on long documents.
+
+Compares the original string-concatenating ``extract_full_text`` followed
+by ``find_emails`` with the page-by-page scan (``find_emails_in_pdf``),
+the process-pool extraction (``parallel=True``), a warm text cache
+(``cache=TextCache()``: a repeated click on the same upload), the first-pages
+author scan (``find_author_emails``) and the TEI-first lookup
+(``find_paper_emails``, given a TEI header with the authors' <email>s)
+on synthetic PDFs of growing page count. Each PDF ends with a reference list full of
+unrelated addresses. The page-by-page and parallel scans must find exactly
+what the full text does; the author scan is reported with how many of those
+addresses it returned, and must agree with the TEI. Reports time and peak Python memory.
+
+Examples:
+    python benchmarks/email_extraction_benchmark.py
+    python benchmarks/email_extraction_benchmark.py --pages 50 200 800 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import summarize
+from run_pipeline_benchmark import synthetic_pdf
+
+from src.parser.email_extractor import (
+    PARALLEL_WORKERS, extract_full_text, find_author_emails, find_emails, find_emails_in_pdf, find_paper_emails
+)
+from src.parser.tei_document import TeiDocument
+from src.parser.text_cache import TextCache
+
+AUTHOR_EMAILS = ['ada.example@example.edu', 'ben.sample@example.org']
+
+# What GROBID reports for the synthetic PDF's authors
+AUTHOR_TEI = (
+    '<TEI xmlns="http://www.tei-c.org/ns/1.0"><teiHeader><fileDesc><sourceDesc><biblStruct><analytic>'
+    + ''.join(f'<author><persName><surname>{email.split("@")[0]}</surname></persName><email>{email}</email></author>'
+              for email in AUTHOR_EMAILS)
+    + '</analytic></biblStruct></sourceDesc></fileDesc></teiHeader></TEI>'
+)
+
+
+def concatenated_text(pdf_path: str) -> str:
+    """The original extract_full_text: one += per page."""
+    import fitz
+
+    full_text = ""
+    doc = fitz.open(pdf_path)
+    for page in doc:
+        full_text += page.get_text()
+    doc.close()
+    return full_text
+
+
+def add_reference_emails(pdf_path: str, count: int = 20):
+    """Append a reference page citing `count` other people's addresses."""
+    import fitz
+
+    doc = fitz.open(pdf_path)
+    page = doc.new_page()
+    references = "References\n" + "\n".join(
+        f"[{i}] Cited Author {i}. Some paper. Contact: cited{i}@other-university.edu" for i in range(count)
+    )
+    page.insert_textbox(fitz.Rect(50, 50, 550, 800), references, fontsize=8)
+    doc.saveIncr()
+    doc.close()
+
+
+def best_of(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def peak_memory(fn) -> int:
+    """Peak bytes allocated by Python while running fn() (MuPDF's own buffers are not traced)."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text extraction and email search")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 400], help="Page counts to test")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per method")
+    args = parser.parse_args()
+
+    methods = {
+        'concatenate + find': lambda pdf: find_emails(concatenated_text(pdf)),
+        'full text + find': lambda pdf: find_emails(extract_full_text(pdf)),
+        'page by page': lambda pdf: find_emails_in_pdf(pdf, parallel=False),
+        f'parallel ({PARALLEL_WORKERS} workers)': lambda pdf: find_emails_in_pdf(pdf, parallel=True),
+        'text cache hit': lambda pdf: find_emails_in_pdf(pdf, cache=text_cache),
+        'page by page, limit 2': lambda pdf: find_emails_in_pdf(pdf, limit=2),
+        'author fast path': lambda pdf: find_author_emails(pdf),
+        # Parsed once by the pipeline already (metadata); only the lookup is timed
+        'TEI first': lambda pdf: find_paper_emails(pdf, tei_doc),
+    }
+
+    tei_doc = TeiDocument(AUTHOR_TEI, header_only=True)
+    text_cache = TextCache()
+    with tempfile.TemporaryDirectory(prefix="email-bench-") as tmp_dir:
+        print(f"{'pages':>6}  {'method':<24}{'p50 (ms)':>10}{'peak':>12}")
+        for pages in args.pages:
+            pdf = os.path.join(tmp_dir, f"{pages}.pdf")
+            synthetic_pdf(pdf, pages=pages)
+            add_reference_emails(pdf)
+
+            expected = find_emails(concatenated_text(pdf))
+            if find_emails_in_pdf(pdf, parallel=False) != expected or extract_full_text(pdf) != concatenated_text(pdf):
+                print(f"❌ Page-by-page results differ on {pages} pages")
+                sys.exit(1)
+            # Also starts the worker processes before anything is timed
+            if extract_full_text(pdf, parallel=True) != concatenated_text(pdf):
+                print(f"❌ Parallel extraction differs on {pages} pages")
+                sys.exit(1)
+            # The first call fills the cache, the second is served from it
+            if any(find_emails_in_pdf(pdf, cache=text_cache) != expected for _ in range(2)):
+                print(f"❌ Cached text gives different emails on {pages} pages")
+                sys.exit(1)
+            authors = find_author_emails(pdf)
+            if authors != AUTHOR_EMAILS or find_paper_emails(pdf, tei_doc) != AUTHOR_EMAILS:
+                print(f"❌ Author fast path returned {authors} on {pages} pages")
+                sys.exit(1)
+            print(f"{pages:>6}  emails: full scan {len(expected)}, author fast path {len(authors)}")
+
+            for name, method in methods.items():
+                p50 = summarize(best_of(lambda: method(pdf), args.repeat))['p50']
+                peak = peak_memory(lambda: method(pdf))
+                print(f"{pages:>6}  {name:<24}{p50 * 1000:>10.1f}{peak / 1e6:>9.3f} MB")
+    print("✅ Page-by-page and parallel scans found the same emails as the full text; "
+          "the author fast path and the TEI only the authors'")
+
+
+if __name__ == "__main__":
+    main()
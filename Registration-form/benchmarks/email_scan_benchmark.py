@@ -0,0 +1,127 @@
+"""
+Microbenchmark the email scanner against the regex it replaces.
+
+``find_emails`` used to run ``EMAIL_REGEX.findall`` over the text, which
+tries a match at every character and re-reads each word up to its end.
+``scan_emails`` jumps between '@' signs instead. Both are timed on long
+synthetic documents:
+
+    prose       paper-like text with a few addresses near the start
+    references  prose followed by a reference list full of addresses
+    blobs       unbroken alphanumeric runs (hashes, identifiers, URLs)
+    mentions    many '@' signs that are not emails ("@user", "a @ b")
+
+after checking on each that the scanner returns exactly what the regex
+does, and on random strings that the two never disagree.
+
+Examples:
+    python benchmarks/email_scan_benchmark.py
+    python benchmarks/email_scan_benchmark.py --size 20 --repeat 10 --fuzz 0
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import summarize
+
+from src.parser.email_extractor import EMAIL_REGEX, scan_emails
+
+WORDS = ("the of and to in a is that for on with as by this we are be method data model results "
+         "learning network proposed approach performance section table figure").split()
+
+
+def prose(size: int, rng: random.Random) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    words[20:20] = ['ada.example@example.edu', 'ben.sample@example.org']
+    return ' '.join(words)
+
+
+def references(size: int, rng: random.Random) -> str:
+    text = prose(size // 2, rng)
+    entries = []
+    length = len(text)
+    i = 0
+    while length < size:
+        entry = f"\n[{i}] Cited Author {i}. Some paper title. Contact: cited{i}@other-university.edu"
+        entries.append(entry)
+        length += len(entry)
+        i += 1
+    return text + ''.join(entries)
+
+
+def blobs(size: int, rng: random.Random) -> str:
+    alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.-_'
+    parts = []
+    length = 0
+    while length < size:
+        part = ''.join(rng.choices(alphabet, k=rng.randint(20, 100)))
+        parts.append(part)
+        length += len(part) + 1
+    return ' '.join(parts)
+
+
+def mentions(size: int, rng: random.Random) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS + ['@user', 'a @ b', 'x@y', 'name@host', '@'])
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def fuzz(count: int, rng: random.Random):
+    alphabet = 'aZ9._%+-@ \n{}éabcdefgh'
+    for _ in range(count):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+        if list(scan_emails(text)) != EMAIL_REGEX.findall(text):
+            print(f"❌ Scanner differs from the regex on {text!r}")
+            sys.exit(1)
+
+
+def timings(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the email scanner against regex findall")
+    parser.add_argument("--size", type=float, default=2.0, help="Document size in MB of text")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per method")
+    parser.add_argument("--fuzz", type=int, default=50000, help="Random strings to compare first")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    fuzz(args.fuzz, rng)
+    size = int(args.size * 1e6)
+    documents = {name: make(size, rng) for name, make in
+                 (('prose', prose), ('references', references), ('blobs', blobs), ('mentions', mentions))}
+    for name, text in documents.items():
+        if list(scan_emails(text)) != EMAIL_REGEX.findall(text):
+            print(f"❌ Scanner differs from the regex on the {name} document")
+            sys.exit(1)
+    print(f"✅ Scanner matches EMAIL_REGEX.findall ({args.fuzz} random strings, {len(documents)} documents)\n")
+
+    print(f"{'document':<12}{'emails':>8}{'regex (ms)':>12}{'scanner (ms)':>14}{'speedup':>9}")
+    for name, text in documents.items():
+        regex = summarize(timings(lambda: EMAIL_REGEX.findall(text), args.repeat))['p50']
+        scanner = summarize(timings(lambda: list(scan_emails(text)), args.repeat))['p50']
+        print(f"{name:<12}{len(EMAIL_REGEX.findall(text)):>8}{regex * 1000:>12.1f}"
+              f"{scanner * 1000:>14.1f}{regex / scanner:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Check that GROBID failover stays within the retry policy's deadline.
+
+Starts local mock GROBID servers that hang on every request (and one
+that answers) and calls ``parse_pdf_with_grobid`` through a
+``GrobidPool`` of them:
+
+    all hanging         every endpoint stalls: GrobidDeadlineExceeded must
+                        be raised no later than the deadline
+    one answering       the hanging endpoints come first: failover must
+                        still reach the answering one within the deadline
+
+Each endpoint tried gets at most the per-request timeout, and only what
+is left of the deadline, so the call never takes endpoints x timeout.
+
+Examples:
+    python benchmarks/grobid_failover_benchmark.py
+    python benchmarks/grobid_failover_benchmark.py --endpoints 4 --deadline 6 --request-timeout 2
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_utils  # noqa: F401 (puts the project on sys.path)
+from mock_grobid import MockGrobidServer
+
+from src.parser.grobid_client import parse_pdf_with_grobid
+from src.parser.grobid_pool import GrobidPool
+from src.parser.retry_policy import GrobidDeadlineExceeded, RetryPolicy
+
+# What the deadline may be overshot by: thread wake-ups and socket teardown
+SLACK_SECONDS = 0.5
+PDF = b"%PDF-1.4\n% stand-in, the mock does not parse it\n%%EOF\n"
+
+
+def run(servers, deadline: float, request_timeout: float):
+    """Seconds taken by one pooled call, and its TEI (None if it failed)."""
+    policy = RetryPolicy(deadline=deadline, base_delay=0.05, max_delay=0.2, min_timeout=request_timeout,
+                         max_timeout=request_timeout, cold_timeout=request_timeout)
+    pool = GrobidPool([server.url for server in servers], pool_size=2, failure_threshold=100)
+    start = time.perf_counter()
+    try:
+        tei = parse_pdf_with_grobid(PDF, pool.grobid_server, client=pool, retry_policy=policy)
+    except GrobidDeadlineExceeded:
+        tei = None
+    return time.perf_counter() - start, tei
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check GROBID failover against the deadline")
+    parser.add_argument("--endpoints", type=int, default=3, help="Hanging endpoints")
+    parser.add_argument("--deadline", type=float, default=4.0, help="Time budget per GROBID call in seconds")
+    parser.add_argument("--request-timeout", type=float, default=3.0, help="Per-request timeout in seconds")
+    args = parser.parse_args()
+
+    hang = args.deadline * args.endpoints + 5
+    hanging = [MockGrobidServer(timeout_rate=1.0, hang_seconds=hang).start() for _ in range(args.endpoints)]
+    answering = MockGrobidServer().start()
+    try:
+        elapsed, tei = run(hanging, args.deadline, args.request_timeout)
+        print(f"{args.endpoints} hanging endpoints: gave up after {elapsed:.2f}s "
+              f"(deadline {args.deadline:.1f}s, timeout {args.request_timeout:.1f}s per request)")
+        if tei is not None or elapsed > args.deadline + SLACK_SECONDS:
+            print(f"❌ Expected GrobidDeadlineExceeded within {args.deadline:.1f}s")
+            sys.exit(1)
+
+        # Enough budget to time out on every hanging endpoint before the answering one
+        deadline = args.request_timeout * (args.endpoints + 1)
+        elapsed, tei = run(hanging + [answering], deadline, args.request_timeout)
+        print(f"{args.endpoints} hanging endpoints, then one answering: TEI after {elapsed:.2f}s "
+              f"(deadline {deadline:.1f}s)")
+        if tei is None or elapsed > deadline + SLACK_SECONDS:
+            print(f"❌ Expected the answering endpoint's TEI within {deadline:.1f}s")
+            sys.exit(1)
+    finally:
+        for server in hanging + [answering]:
+            server.stop()
+    print("✅ Failover stays within the deadline")
+
+
+if __name__ == "__main__":
+    main()
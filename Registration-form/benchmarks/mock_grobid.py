@@ -0,0 +1,184 @@
+"""
+Local stand-in for a GROBID server, for benchmarks that must run offline.
+
+Replays canned TEI for processFulltextDocument / processHeaderDocument
+with configurable latency, 503 rate, hung requests and response
+bandwidth, so retry, pooling, caching and streaming changes can be
+measured without the hosted service.
+"""
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_TEI_PATH = os.path.join(FIXTURES_DIR, "TA.tei.xml")
+
+
+def load_fixture_tei(path: str = DEFAULT_TEI_PATH) -> str:
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def header_tei(tei_xml: str) -> str:
+    """What processHeaderDocument returns: the same TEI without <text>."""
+    return re.sub(r'\s*<text\b.*?</text>', '', tei_xml, flags=re.S)
+
+
+class MockGrobidServer:
+    """
+    Threaded HTTP server speaking just enough of the GROBID API.
+
+    Args:
+        tei_xml: Full-text TEI to replay (defaults to fixtures/TA.tei.xml)
+        latency: Base processing time per request in seconds
+        jitter: Uniform random extra latency in seconds
+        latency_per_mb: Extra seconds per MB of uploaded request body
+        error_rate: Fraction of requests answered with 503
+        timeout_rate: Fraction of requests that hang for `hang_seconds`
+        hang_seconds: How long a "timed out" request stalls before answering
+        bandwidth: Response bytes per second, 0 for unthrottled
+        seed: Seed for the fault injection RNG (reproducible runs)
+        port: Port to listen on (0 picks a free one)
+    """
+
+    def __init__(self, tei_xml: Optional[str] = None, latency: float = 0.0, jitter: float = 0.0,
+                 latency_per_mb: float = 0.0, error_rate: float = 0.0, timeout_rate: float = 0.0,
+                 hang_seconds: float = 5.0, bandwidth: float = 0.0, seed: Optional[int] = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.tei = {
+            'processFulltextDocument': tei_xml if tei_xml is not None else load_fixture_tei(),
+        }
+        self.tei['processHeaderDocument'] = header_tei(self.tei['processFulltextDocument'])
+        self.latency = latency
+        self.jitter = jitter
+        self.latency_per_mb = latency_per_mb
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.bandwidth = bandwidth
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockGrobidServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-grobid', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _fault(self):
+        """Decide one request's outcome ('ok', 'error' or 'hang') and its jitter."""
+        with self._lock:
+            roll = self._random.random()
+            extra = self._random.uniform(0, self.jitter) if self.jitter else 0.0
+        if roll < self.error_rate:
+            return 'error', extra
+        if roll < self.error_rate + self.timeout_rate:
+            return 'hang', extra
+        return 'ok', extra
+
+    def _record(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client closed a kept-alive connection (e.g. a stream closed early)
+                    pass
+
+            def _reply(self, status: int, body: bytes, content_type: str = 'text/plain',
+                       bandwidth: float = 0.0):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if not bandwidth:
+                    self.wfile.write(body)
+                    return
+                # Trickle the body out like a slow link would
+                chunk_size = 8 * 1024
+                for offset in range(0, len(body), chunk_size):
+                    self.wfile.write(body[offset:offset + chunk_size])
+                    self.wfile.flush()
+                    time.sleep(chunk_size / bandwidth)
+
+            def do_GET(self):
+                if self.path.rstrip('/').endswith('/api/isalive'):
+                    self._reply(200, b'true')
+                else:
+                    self._reply(404, b'not found')
+
+            def do_POST(self):
+                # Drain the upload like GROBID would before processing it
+                remaining = int(self.headers.get('Content-Length', 0))
+                size = remaining
+                while remaining > 0:
+                    chunk = self.rfile.read(min(remaining, 64 * 1024))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+
+                service = self.path.rstrip('/').rsplit('/', 1)[-1]
+                tei_xml = server.tei.get(service)
+                if tei_xml is None:
+                    server._record('not_found')
+                    self._reply(404, b'unknown service')
+                    return
+
+                outcome, extra = server._fault()
+                delay = server.latency + extra + server.latency_per_mb * size / (1024 * 1024)
+                if outcome == 'hang':
+                    server._record('hung')
+                    time.sleep(server.hang_seconds)
+                elif delay:
+                    time.sleep(delay)
+
+                if outcome == 'error':
+                    server._record('503')
+                    self._reply(503, b'Service Unavailable')
+                    return
+                server._record(service)
+                try:
+                    self._reply(200, tei_xml.encode('utf-8'), 'application/xml', server.bandwidth)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (timed out) while we were "processing"
+                    server._record('client_disconnected')
+
+        return Handler
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
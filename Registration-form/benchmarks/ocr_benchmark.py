@@ -0,0 +1,189 @@
+"""
+Benchmark receipt OCR: fresh engines per receipt against the warm pools.
+
+Times, per receipt, on synthetic phone-screenshot receipts:
+
+    --engine easyocr
+        new reader          the original code: easyocr.Reader(['en']) per
+                            call, image re-encoded to PNG bytes
+        warm pool           get_easyocr_pool().readtext(array), one at a time
+        warm pool, xN       N receipts submitted at once, recognized in batches
+
+    --engine tesseract
+        subprocess          the original code: pytesseract.image_to_string
+                            (temp file and a new tesseract process per call)
+        cold engine         without the tesseract binary: the temp file and
+                            a tesserocr engine loaded per call, i.e. the
+                            subprocess minus its process start-up
+        warm engines        TesseractPool.image_to_string, one at a time
+        warm engines, xN    N receipts from N threads at once
+
+after checking that the pools read exactly the text the original code did
+(Tesseract: up to the trailing form feed). EasyOCR, tesserocr and the
+tesseract binary are optional; each engine needs its own installed.
+
+Examples:
+    python benchmarks/ocr_benchmark.py
+    python benchmarks/ocr_benchmark.py --engine tesseract --workers 2 --threads 4
+    python benchmarks/ocr_benchmark.py --receipts 16 --concurrency 8 --width 720 --height 1600
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import print_table, summarize
+from receipt_fixtures import make_receipt
+
+from src.parser.easyocr_pool import EasyOcrPool, as_ocr_array
+from src.parser.tesseract_pool import TESSEROCR_AVAILABLE, TesseractPool, tessdata_path
+
+
+def original_easyocr(image) -> str:
+    """extract_text_from_image_easyocr before the pool."""
+    import easyocr
+
+    reader = easyocr.Reader(['en'])
+    img_byte_arr = io.BytesIO()
+    image.save(img_byte_arr, format="PNG")
+    results = reader.readtext(img_byte_arr.getvalue())
+    return " ".join([r[1] for r in results])
+
+
+def original_tesseract(image) -> str:
+    """extract_text_from_image_tesseract before the pool."""
+    import pytesseract
+
+    return pytesseract.image_to_string(image)
+
+
+def cold_tesseract(image) -> str:
+    """A lower bound for ``original_tesseract``: everything but starting the process."""
+    import tesserocr
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'receipt.png')
+        image.save(path)
+        data = tessdata_path('eng')
+        api = tesserocr.PyTessBaseAPI(lang='eng') if data is None else tesserocr.PyTessBaseAPI(path=data, lang='eng')
+        with api:
+            api.SetImageFile(path)
+            return api.GetUTF8Text()
+
+
+def timings(fn, items):
+    samples = []
+    results = []
+    for item in items:
+        start = time.perf_counter()
+        results.append(fn(item))
+        samples.append(time.perf_counter() - start)
+    return samples, results
+
+
+def easyocr_report(args, receipts) -> dict:
+    try:
+        import easyocr  # noqa: F401
+    except ImportError:
+        print("❌ EasyOCR is not installed (pip install easyocr)")
+        sys.exit(1)
+
+    arrays = [as_ocr_array(receipt) for receipt in receipts]
+    pool = EasyOcrPool(size=1, batch_size=args.concurrency)
+
+    def pooled(image) -> str:
+        return " ".join([r[1] for r in pool.readtext(image)])
+
+    start = time.perf_counter()
+    pool.warm_up()
+    print(f"Pool warm-up: {time.perf_counter() - start:.2f}s")
+
+    # The original is slow: compare and time it on the first two receipts only
+    sample = receipts[:2]
+    for receipt, array in zip(sample, arrays):
+        if pooled(array) != original_easyocr(receipt):
+            print("❌ Warm pool read different text than a fresh reader")
+            sys.exit(1)
+    print("✅ Warm pool reads the same text as a fresh reader per receipt\n")
+
+    report = {'new reader': summarize(timings(original_easyocr, sample)[0])}
+    samples, sequential = timings(pooled, arrays)
+    report['warm pool'] = summarize(samples)
+
+    # Per-receipt cost when `concurrency` receipts are queued together
+    samples = []
+    batched = []
+    for i in range(0, len(arrays), args.concurrency):
+        group = arrays[i:i + args.concurrency]
+        start = time.perf_counter()
+        futures = [pool.submit(array) for array in group]
+        batched.extend(" ".join([r[1] for r in future.result()]) for future in futures)
+        samples.extend([(time.perf_counter() - start) / len(group)] * len(group))
+    report[f'warm pool, x{args.concurrency}'] = summarize(samples)
+    print(f"Batched text identical to one-at-a-time: {'yes' if batched == sequential else 'no'}\n")
+    return report
+
+
+def tesseract_report(args, receipts) -> dict:
+    pool = TesseractPool(workers=args.workers, thread_limit=args.threads)
+    if not TESSEROCR_AVAILABLE:
+        print("⚠️ tesserocr is not installed: the pool runs the tesseract command (pip install tesserocr)")
+
+    start = time.perf_counter()
+    pool.warm_up()
+    print(f"Pool warm-up: {time.perf_counter() - start:.2f}s "
+          f"({pool.workers} engines x {pool.threads_per_engine} threads)")
+
+    baseline, name = original_tesseract, 'subprocess'
+    try:
+        expected = [baseline(receipt).rstrip('\f') for receipt in receipts]
+    except Exception as e:
+        if not TESSEROCR_AVAILABLE:
+            print(f"❌ Tesseract is not available: {e}")
+            sys.exit(1)
+        print(f"⚠️ The tesseract command is not available ({e}): "
+              "timing a cold tesserocr engine per receipt instead, a lower bound for the subprocess")
+        baseline, name = cold_tesseract, 'cold engine'
+        expected = [baseline(receipt).rstrip('\f') for receipt in receipts]
+    if [pool.image_to_string(receipt).rstrip('\f') for receipt in receipts] != expected:
+        print(f"❌ Warm engines read different text than the {name}")
+        sys.exit(1)
+    print(f"✅ Warm engines read the same text as the {name}\n")
+
+    report = {
+        name: summarize(timings(baseline, receipts)[0]),
+        'warm engines': summarize(timings(pool.image_to_string, receipts)[0]),
+    }
+    # Per-receipt cost with `concurrency` sessions reading receipts at once
+    with ThreadPoolExecutor(max_workers=args.concurrency) as sessions:
+        start = time.perf_counter()
+        list(sessions.map(pool.image_to_string, receipts))
+        elapsed = time.perf_counter() - start
+    report[f'warm engines, x{args.concurrency}'] = summarize([elapsed / len(receipts)] * len(receipts))
+    pool.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark warm OCR engines against fresh ones per receipt")
+    parser.add_argument("--engine", choices=['easyocr', 'tesseract'], default='easyocr', help="OCR engine")
+    parser.add_argument("--receipts", type=int, default=8, help="Receipts to read per method")
+    parser.add_argument("--concurrency", type=int, default=4, help="Receipts submitted at once")
+    parser.add_argument("--width", type=int, default=1080, help="Receipt width in pixels")
+    parser.add_argument("--height", type=int, default=2340, help="Receipt height in pixels")
+    parser.add_argument("--workers", type=int, default=2, help="Tesseract engines")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="OCR threads across all engines")
+    args = parser.parse_args()
+
+    receipts = [make_receipt(args.width, args.height, seed=i) for i in range(args.receipts)]
+    report = (easyocr_report if args.engine == 'easyocr' else tesseract_report)(args, receipts)
+    print_table(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark decoding receipt uploads: full resolution against ``open_receipt``.
+
+Encodes a synthetic phone receipt (12 MP by default) as JPEG and PNG and
+decodes it with
+
+    full decode         the original code: Image.open(...).convert('RGB')
+    open_receipt        reduced decode within RECEIPT_DECODE_PIXELS, RGB
+    open_receipt, L     the same in grayscale (what preprocessing reads)
+
+reporting time and the peak resident memory of a fresh process doing one
+decode. It first checks that the reduced decodes fit the budget and match
+the full-size image reduced to the same size (also for bilevel and 16-bit
+grayscale PNGs, which ``Image.reduce`` does not take), and that an
+oversized image is refused before decoding.
+
+Examples:
+    python benchmarks/receipt_decode_benchmark.py
+    python benchmarks/receipt_decode_benchmark.py --width 1080 --height 2340 --budget 1000000
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from PIL import Image
+
+from bench_utils import print_table, summarize
+from receipt_fixtures import make_receipt
+
+from src.parser.image_extractor import RECEIPT_MAX_PIXELS, open_receipt
+
+
+def full_decode(data: bytes, budget: int) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image = image.convert('RGB')
+    image.load()
+    return image
+
+
+METHODS = {
+    'full decode': full_decode,
+    'open_receipt': lambda data, budget: open_receipt(io.BytesIO(data), 'RGB', budget),
+    'open_receipt, L': lambda data, budget: open_receipt(io.BytesIO(data), 'L', budget),
+}
+
+
+def _peak_rss_kb() -> int:
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _peak_worker(name: str, data: bytes, budget: int, results):
+    try:
+        # Linux: restart the peak from the current RSS, past the imports
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+    before = _peak_rss_kb()
+    METHODS[name](data, budget)
+    results.put(_peak_rss_kb() - before)
+
+
+def peak_memory_kb(name: str, data: bytes, budget: int) -> int:
+    """Growth of peak RSS (KB) of a fresh interpreter decoding once (Linux: exact; elsewhere a lower bound)."""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    worker = context.Process(target=_peak_worker, args=(name, data, budget, results))
+    worker.start()
+    peak = results.get()
+    worker.join()
+    return peak
+
+
+def check(data: bytes, budget: int):
+    full = full_decode(data, budget)
+    reduced = open_receipt(io.BytesIO(data), 'RGB', budget)
+    if reduced.size[0] * reduced.size[1] > budget:
+        print(f"❌ Reduced decode is {reduced.size}, over the {budget} pixel budget")
+        sys.exit(1)
+    expected = np.asarray(full.resize(reduced.size, Image.Resampling.BOX), dtype=np.int16)
+    error = np.abs(np.asarray(reduced, dtype=np.int16) - expected).mean()
+    # JPEG scaled decoding is close to, not exactly, box averaging
+    if error > 2.0:
+        print(f"❌ Reduced decode differs from the full image by {error:.2f} levels on average")
+        sys.exit(1)
+
+
+def check_modes(receipt: Image.Image, budget: int):
+    """Bilevel ('1') and 16-bit ('I;16') scans: decoded within budget, in RGB and L, with their levels."""
+    bilevel = receipt.convert('1')
+    gray = np.asarray(receipt.convert('L'))
+    scans = {
+        '1': (bilevel, bilevel.convert('L')),
+        'I;16': (Image.fromarray(gray.astype(np.uint16) * 257), Image.fromarray(gray)),
+    }
+    for name, (scan, levels) in scans.items():
+        buffer = io.BytesIO()
+        scan.save(buffer, 'PNG')
+        for mode in ('RGB', 'L'):
+            try:
+                reduced = open_receipt(io.BytesIO(buffer.getvalue()), mode, budget)
+            except Exception as e:
+                print(f"❌ A mode {name} PNG failed to decode in {mode}: {e}")
+                sys.exit(1)
+            if reduced.mode != mode or reduced.size[0] * reduced.size[1] > budget:
+                print(f"❌ A mode {name} PNG decoded as {reduced.mode} {reduced.size}")
+                sys.exit(1)
+            expected = np.asarray(levels.resize(reduced.size, Image.Resampling.BOX), dtype=np.int16)
+            error = np.abs(np.asarray(reduced.convert('L'), dtype=np.int16) - expected).mean()
+            if error > 2.0:
+                print(f"❌ A mode {name} PNG decoded in {mode} differs by {error:.2f} levels on average")
+                sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reduced-resolution receipt decoding")
+    parser.add_argument("--width", type=int, default=3024, help="Receipt width in pixels")
+    parser.add_argument("--height", type=int, default=4032, help="Receipt height in pixels")
+    parser.add_argument("--budget", type=int, default=4000000, help="Pixels to decode at most")
+    parser.add_argument("--repeat", type=int, default=10, help="Decodes timed per method")
+    args = parser.parse_args()
+
+    receipt = make_receipt(args.width, args.height)
+    encoded = {}
+    for fmt, options in (('JPEG', {'quality': 90}), ('PNG', {})):
+        buffer = io.BytesIO()
+        receipt.save(buffer, fmt, **options)
+        encoded[fmt] = buffer.getvalue()
+        check(encoded[fmt], args.budget)
+    check_modes(receipt, args.budget)
+
+    side = int(RECEIPT_MAX_PIXELS ** 0.5) + 1
+    buffer = io.BytesIO()
+    Image.new('L', (side, side), 255).save(buffer, 'PNG')
+    start = time.perf_counter()
+    try:
+        open_receipt(io.BytesIO(buffer.getvalue()))
+    except Image.DecompressionBombError:
+        refused = time.perf_counter() - start
+    else:
+        print(f"❌ A {side}x{side} image was decoded")
+        sys.exit(1)
+    print(f"✅ Reduced decodes (also of bilevel and 16-bit PNGs) fit {args.budget} pixels and match the full image; "
+          f"{side}x{side} refused in {refused * 1000:.2f} ms\n")
+
+    for fmt, data in encoded.items():
+        print(f"{fmt}, {len(data) / 1e6:.1f} MB file")
+        report = {}
+        for name, method in METHODS.items():
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                method(data, args.budget)
+                samples.append(time.perf_counter() - start)
+            report[name] = summarize(samples)
+            print(f"  {name:<18} peak memory +{peak_memory_kb(name, data, args.budget) / 1024:.0f} MB")
+        print_table(report)
+        print()
+
+
+if __name__ == "__main__":
+    main()
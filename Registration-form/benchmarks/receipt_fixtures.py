@@ -0,0 +1,54 @@
+"""
+Synthetic payment receipt screenshots for the OCR benchmarks.
+"""
+import random
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+RECEIPT_LINES = [
+    "Payment Successful",
+    "Rs. {amount}",
+    "Paid to SDC MUJ Conference",
+    "UPI transaction ID",
+    "{upi}",
+    "Google transaction ID",
+    "{google}",
+    "UTR: {utr}",
+    "Status: Completed",
+    "Date: 12 Mar 2026, 10:42 am",
+]
+
+
+def receipt_fields(seed: int = 0) -> dict:
+    """The values printed on receipt `seed`."""
+    rng = random.Random(seed)
+    return {
+        'amount': f"{rng.randint(500, 5000):,}.00",
+        'upi': ''.join(rng.choice('0123456789') for _ in range(12)),
+        'google': 'CICAgOD' + ''.join(rng.choice('abcdefghijkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789')
+                                      for _ in range(13)),
+        'utr': ''.join(rng.choice('0123456789') for _ in range(12)),
+    }
+
+
+def make_receipt(width: int = 1080, height: int = 2340, seed: int = 0, font_size: int = 0,
+                 dark: bool = False) -> Image.Image:
+    """
+    A phone-screenshot-sized receipt: dark text on white, with the fields
+    of ``receipt_fields(seed)`` in the middle and blank space around them.
+    With `dark`, the same receipt in dark mode: every colour inverted,
+    light text on near-black.
+    """
+    fields = receipt_fields(seed)
+    font_size = font_size or max(16, width // 24)
+    font = ImageFont.load_default(size=font_size)
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    # Status bar and app header, as on a real screenshot
+    draw.rectangle((0, 0, width, height // 25), fill=(30, 30, 30))
+    draw.rectangle((0, height // 25, width, height // 9), fill=(26, 115, 232))
+    y = height // 5
+    for line in RECEIPT_LINES:
+        draw.text((width // 12, y), line.format(**fields), fill=(20, 20, 20), font=font)
+        y += int(font_size * 1.8)
+    return ImageOps.invert(image) if dark else image
@@ -0,0 +1,108 @@
+"""
+Benchmark receipt preprocessing before Tesseract.
+
+On synthetic phone receipts (12 MP by default, each tilted by a random
+angle up to --max-skew degrees), in light and in dark mode, it times
+``preprocess_receipt`` and reports how many pixels are left for OCR. It
+first checks that every output is deskewed (text lines within 0.3
+degrees of horizontal), and that each dark-mode receipt comes out as its
+light twin does: black text on white.
+
+With Tesseract installed it then reads every receipt as uploaded and
+preprocessed, and reports OCR time and how often ``extract_payment_details``
+finds the receipt's UPI transaction ID and UTR in each, light and dark.
+
+Examples:
+    python benchmarks/receipt_preprocess_benchmark.py
+    python benchmarks/receipt_preprocess_benchmark.py --receipts 16 --width 1080 --height 2340 --max-skew 8
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from bench_utils import print_table, summarize
+from ocr_benchmark import timings
+from receipt_fixtures import make_receipt, receipt_fields
+
+from src.parser.image_extractor import estimate_skew, extract_payment_details, preprocess_receipt
+from src.parser.tesseract_pool import TesseractPool
+
+
+# Pixels of a dark receipt's output that must match its light twin's;
+# grayscale conversion may round the inverted colours differently
+MIN_AGREEMENT = 0.999
+
+
+def hit_rate(texts, seeds) -> str:
+    hits = 0
+    for text, seed in zip(texts, seeds):
+        details = extract_payment_details(text)
+        fields = receipt_fields(seed)
+        hits += details['upi_transaction_id'] == fields['upi']
+        hits += details['utr_number'] == fields['utr']
+    return f"{hits}/{2 * len(seeds)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark receipt preprocessing before OCR")
+    parser.add_argument("--receipts", type=int, default=8, help="Receipts to preprocess")
+    parser.add_argument("--width", type=int, default=3024, help="Receipt width in pixels")
+    parser.add_argument("--height", type=int, default=4032, help="Receipt height in pixels")
+    parser.add_argument("--max-skew", type=float, default=5.0, help="Largest tilt applied, in degrees")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    seeds = list(range(args.receipts))
+    angles = [rng.uniform(-args.max_skew, args.max_skew) for _ in seeds]
+    receipts = [
+        make_receipt(args.width, args.height, seed=seed, dark=dark).rotate(
+            angle, resample=Image.Resampling.BICUBIC, fillcolor='black' if dark else 'white')
+        for dark in (False, True) for seed, angle in zip(seeds, angles)
+    ]
+    seeds = seeds + seeds
+
+    preprocess_receipt(receipts[0])
+    samples, outputs = timings(preprocess_receipt, receipts)
+    residual = max(abs(estimate_skew(output)) for output in outputs)
+    if residual > 0.3:
+        print(f"❌ Preprocessed receipt still tilted by {residual:.1f} degrees")
+        sys.exit(1)
+    half = len(outputs) // 2
+    for seed, light, dark in zip(seeds, outputs[:half], outputs[half:]):
+        if light.shape != dark.shape or (light == dark).mean() < MIN_AGREEMENT:
+            print(f"❌ Dark-mode receipt {seed} does not come out like its light twin")
+            sys.exit(1)
+    print("✅ Every preprocessed receipt is level, and dark-mode receipts come out like light ones\n")
+
+    before = args.width * args.height
+    after = sum(output.size for output in outputs) / len(outputs)
+    print(f"Pixels per receipt: {before / 1e6:.1f} M -> {after / 1e6:.2f} M ({before / after:.0f}x fewer)\n")
+    report = {'preprocess': summarize(samples)}
+
+    pool = TesseractPool(workers=1)
+    try:
+        pool.image_to_string(receipts[0])
+    except Exception as e:
+        print(f"⚠️ Tesseract is not available, skipping OCR: {e}\n")
+        print_table(report)
+        return
+
+    original_samples, original_texts = timings(pool.image_to_string, receipts)
+    report['tesseract, original'] = summarize(original_samples)
+    ocr_samples, texts = timings(pool.image_to_string, [Image.fromarray(output) for output in outputs])
+    report['tesseract, preprocessed'] = summarize([s + p for s, p in zip(ocr_samples, samples)])
+    for name, part in (('light', slice(None, half)), ('dark', slice(half, None))):
+        print(f"IDs found, {name}, original:     {hit_rate(original_texts[part], seeds[part])}")
+        print(f"IDs found, {name}, preprocessed: {hit_rate(texts[part], seeds[part])}")
+    print()
+    pool.close()
+    print_table(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+End-to-end benchmark of the PDF pipeline against a local mock GROBID.
+
+Drives parse_pdf_with_grobid -> extract_metadata_from_tei ->
+find_paper_emails -> save_to_json / save_to_csv and reports
+per-stage latency percentiles and throughput. Runs fully offline unless
+--server points it at a real GROBID.
+
+Examples:
+    python benchmarks/run_pipeline_benchmark.py
+    python benchmarks/run_pipeline_benchmark.py --iterations 200 --concurrency 8 --latency 0.2 --jitter 0.1
+    python benchmarks/run_pipeline_benchmark.py --error-rate 0.2 --timeout-rate 0.05
+    python benchmarks/run_pipeline_benchmark.py --cache-dir /tmp/tei-bench --header-only
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import PROJECT_ROOT, print_table, summarize, timed
+from mock_grobid import MockGrobidServer
+
+from src.parser.email_extractor import find_paper_emails
+from src.parser.grobid_client import extract_metadata_from_tei, get_grobid_client, parse_pdf_with_grobid
+from src.parser.retry_policy import RetryPolicy
+from src.parser.tei_cache import TeiCache
+from src.parser.tei_document import as_tei_document
+from src.utils.file_utils import save_to_csv, save_to_json
+
+
+def synthetic_pdf(path: str, pages: int = 4):
+    """Write a small multi-page PDF with a header block and a few emails."""
+    import fitz
+
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        text = f"Page {number + 1}\n" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 30
+        if number == 0:
+            text = (
+                "A Synthetic Paper for Benchmarking\n"
+                "Ada Example, Ben Sample\n"
+                "Department of Computer Science, Example University\n"
+                "ada.example@example.edu, ben.sample@example.org\n\n" + text
+            )
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def default_pdfs(tmp_dir: str) -> List[str]:
+    pdfs = sorted(glob.glob(os.path.join(PROJECT_ROOT, "data", "input", "*.pdf")))
+    if pdfs:
+        return pdfs
+    path = os.path.join(tmp_dir, "synthetic.pdf")
+    synthetic_pdf(path)
+    return [path]
+
+
+def run_once(pdf_path: str, grobid_server: str, client, cache: Optional[TeiCache],
+             retry_policy: RetryPolicy, header_only: bool, output_dir: str, index: int) -> Dict:
+    """One pass through the pipeline; returns the stage timings and outcome."""
+    timings: Dict[str, List[float]] = {}
+    result = {'timings': timings, 'error': None}
+    start = time.perf_counter()
+    try:
+        with timed(timings, 'grobid'):
+            tei_xml = parse_pdf_with_grobid(
+                pdf_path, grobid_server, client=client, cache=cache,
+                retry_policy=retry_policy, header_only=header_only
+            )
+        with timed(timings, 'tei_metadata'):
+            tei_doc = as_tei_document(tei_xml, header_only=header_only)
+            metadata = extract_metadata_from_tei(tei_doc)
+        with timed(timings, 'find_emails'):
+            metadata['emails'] = find_paper_emails(pdf_path, tei_doc)
+        with timed(timings, 'save_outputs'):
+            base = os.path.join(output_dir, f"{index:05d}")
+            save_to_json(metadata, base + ".json")
+            save_to_csv(metadata, base + ".csv")
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    timings['total'] = [time.perf_counter() - start]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PDF pipeline against a mock GROBID server")
+    parser.add_argument("--pdf", nargs="+", help="PDF(s) to process (default: data/input/*.pdf or a synthetic PDF)")
+    parser.add_argument("--iterations", type=int, default=50, help="Pipeline runs in total")
+    parser.add_argument("--concurrency", type=int, default=1, help="Pipeline runs in flight at once")
+    parser.add_argument("--server", help="Benchmark a real GROBID server instead of the mock")
+    parser.add_argument("--tei", help="TEI file the mock replays (default: benchmarks/fixtures/TA.tei.xml)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock base latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Mock random extra latency in seconds")
+    parser.add_argument("--latency-per-mb", type=float, default=0.0, help="Mock extra seconds per uploaded MB")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock requests answered with 503")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of mock requests that hang")
+    parser.add_argument("--request-timeout", type=float, default=2.0, help="Per-request timeout in seconds")
+    parser.add_argument("--deadline", type=float, default=10.0, help="Time budget per GROBID call in seconds")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for mock fault injection")
+    parser.add_argument("--header-only", action="store_true", help="Use processHeaderDocument")
+    parser.add_argument("--cache-dir", help="Enable the TEI cache in this directory (off by default)")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as tmp_dir:
+        pdfs = args.pdf or default_pdfs(tmp_dir)
+        output_dir = os.path.join(tmp_dir, "output")
+        os.makedirs(output_dir)
+
+        mock = None
+        if args.server:
+            grobid_server = args.server
+        else:
+            tei_xml = None
+            if args.tei:
+                with open(args.tei, encoding='utf-8') as f:
+                    tei_xml = f.read()
+            mock = MockGrobidServer(
+                tei_xml=tei_xml, latency=args.latency, jitter=args.jitter,
+                latency_per_mb=args.latency_per_mb, error_rate=args.error_rate,
+                timeout_rate=args.timeout_rate, hang_seconds=args.request_timeout * 1.5,
+                seed=args.seed
+            ).start()
+            grobid_server = mock.url
+
+        client = get_grobid_client(grobid_server, pool_size=max(args.concurrency, 1))
+        cache = TeiCache(args.cache_dir) if args.cache_dir else None
+        retry_policy = RetryPolicy(
+            deadline=args.deadline, base_delay=0.05, max_delay=0.5,
+            min_timeout=args.request_timeout, max_timeout=args.request_timeout
+        )
+
+        print(f"Benchmarking {args.iterations} runs over {len(pdfs)} PDF(s) "
+              f"with concurrency {args.concurrency} against {grobid_server}")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(args.concurrency, 1)) as executor:
+            results = list(executor.map(
+                lambda i: run_once(pdfs[i % len(pdfs)], grobid_server, client, cache,
+                                   retry_policy, args.header_only, output_dir, i),
+                range(args.iterations)
+            ))
+        wall = time.perf_counter() - start
+        if mock is not None:
+            mock.stop()
+
+    timings: Dict[str, List[float]] = {}
+    errors = [r['error'] for r in results if r['error']]
+    for r in results:
+        for stage, samples in r['timings'].items():
+            timings.setdefault(stage, []).extend(samples)
+    stages = ['grobid', 'tei_metadata', 'find_emails', 'save_outputs', 'total']
+    report = {stage: summarize(timings[stage]) for stage in stages if stage in timings}
+
+    print()
+    print_table(report)
+    succeeded = len(results) - len(errors)
+    print(f"\nWall time: {wall:.2f}s  Throughput: {succeeded / wall:.2f} docs/s  "
+          f"Succeeded: {succeeded}/{len(results)}")
+    if mock is not None:
+        print(f"Mock GROBID requests: {mock.snapshot()}")
+    for error in sorted(set(errors))[:5]:
+        print(f"❌ {errors.count(error)}x {error}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'args': vars(args),
+                'wall_seconds': wall,
+                'throughput_docs_per_s': succeeded / wall,
+                'succeeded': succeeded,
+                'failed': len(errors),
+                'stages': report,
+                'mock_requests': mock.snapshot() if mock is not None else None,
+            }, f, indent=4)
+        print(f"Results saved to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
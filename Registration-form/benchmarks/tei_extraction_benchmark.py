@@ -0,0 +1,160 @@
+"""
+Benchmark TEI metadata extraction on large GROBID output.
+
+Compares the multi-pass reference extractor with the single-pass one
+(ElementTree) and the precompiled-XPath one (lxml) on an already parsed
+tree, after checking that they agree field-for-field on the fixture and
+on variants that exercise every fallback. Parse times of both backends
+are reported too, as are the time and peak memory of header-only
+extraction (streaming parse that stops at </teiHeader>) against a full
+parse, as the paper grows, and of bounded body-text extraction against
+joining the whole body.
+
+Examples:
+    python benchmarks/tei_extraction_benchmark.py
+    python benchmarks/tei_extraction_benchmark.py --paragraphs 4000 --references 3000 --repeat 20
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+from xml.etree import ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import print_table, summarize
+from mock_grobid import header_tei, load_fixture_tei
+from tei_fixtures import make_large_tei
+
+from src.parser.grobid_client import extract_metadata_from_tei, extract_metadata_multi_pass
+from src.parser.tei_backend import LXML_AVAILABLE, parse_tei
+from src.parser.tei_document import BODY_TEXT_LIMIT, TeiDocument, extract_metadata_single_pass
+from src.parser.tei_extractor import extract_bounded_text, extract_text_from_element
+
+
+def variants(tei_xml: str):
+    """The TEI plus copies with header parts removed to exercise every fallback."""
+    yield 'as-is', tei_xml
+    yield 'header-only', header_tei(tei_xml)
+    yield 'no-titleStmt-title', re.sub(r'<titleStmt>.*?</titleStmt>', '<titleStmt/>', tei_xml, flags=re.S)
+    yield 'no-main-titles', tei_xml.replace(' type="main"', '')
+    yield 'no-header-authors', re.sub(r'(<sourceDesc>.*?)(\s*<author>.*?</author>)+', r'\1', tei_xml, count=1, flags=re.S)
+    yield 'no-sourceDesc', re.sub(r'<sourceDesc>.*?</sourceDesc>', '', tei_xml, flags=re.S)
+    yield 'no-abstract-div', re.sub(r'<abstract>\s*<div[^>]*>(.*?)</div>', r'<abstract>\1', tei_xml, flags=re.S)
+    yield 'no-keywords', re.sub(r'<keywords>.*?</keywords>', '', tei_xml, flags=re.S)
+
+
+def best_of(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def peak_memory(fn) -> int:
+    """Peak bytes allocated by Python while running fn() (libxml2's own buffers are not traced)."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def header_only_report(repeat: int):
+    """Full parse vs streaming header parse as the body and references grow."""
+    print(f"\n{'paper size':<16}{'full (ms)':>11}{'header (ms)':>13}{'full peak':>12}{'header peak':>13}")
+    for paragraphs, references in ((0, 0), (500, 300), (2000, 1500), (6000, 4500)):
+        tei_xml = make_large_tei(paragraphs, references)
+        expected = extract_metadata_from_tei(header_tei(tei_xml))
+        if extract_metadata_from_tei(tei_xml, header_only=True) != expected:
+            print(f"❌ Header-only extraction differs from the header TEI at {len(tei_xml)} bytes")
+            sys.exit(1)
+        full = summarize(best_of(lambda: extract_metadata_from_tei(tei_xml), repeat))['p50']
+        header = summarize(best_of(lambda: extract_metadata_from_tei(tei_xml, header_only=True), repeat))['p50']
+        full_peak = peak_memory(lambda: extract_metadata_from_tei(tei_xml))
+        header_peak = peak_memory(lambda: extract_metadata_from_tei(tei_xml, header_only=True))
+        print(f"{len(tei_xml) / 1e6:>8.2f} MB     {full * 1000:>11.2f}{header * 1000:>13.2f}"
+              f"{full_peak / 1e6:>9.2f} MB{header_peak / 1e6:>10.2f} MB")
+
+
+def body_text_report(tei_xml: str, backends, repeat: int):
+    """Whole-body join-and-slice vs the bounded accumulator, per backend."""
+    print(f"\n{'body text':<24}{'join (ms)':>11}{'bounded (ms)':>14}{'join peak':>12}{'bounded peak':>14}")
+    for backend in backends:
+        tei_doc = TeiDocument.from_root(parse_tei(tei_xml, backend=backend))
+        body = tei_doc._body
+        join = lambda: extract_text_from_element(body)[:BODY_TEXT_LIMIT]
+        bounded = lambda: extract_bounded_text(body, BODY_TEXT_LIMIT)
+        if join() != bounded():
+            print(f"❌ Bounded body text differs ({backend})")
+            sys.exit(1)
+        paragraphs = sum(1 for _ in tei_doc.iter_body_paragraphs())
+        join_ms = summarize(best_of(join, repeat))['p50'] * 1000
+        bounded_ms = summarize(best_of(bounded, repeat))['p50'] * 1000
+        print(f"{backend + f' ({paragraphs} paragraphs)':<24}{join_ms:>11.2f}{bounded_ms:>14.3f}"
+              f"{peak_memory(join) / 1e6:>9.2f} MB{peak_memory(bounded) / 1e6:>11.3f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single-pass vs multi-pass TEI extraction")
+    parser.add_argument("--paragraphs", type=int, default=2000, help="Body paragraphs to add to the fixture")
+    parser.add_argument("--references", type=int, default=1500, help="References to add to the fixture")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per extractor")
+    args = parser.parse_args()
+
+    fixture = load_fixture_tei()
+    large = make_large_tei(args.paragraphs, args.references)
+
+    backends = ['etree'] + (['lxml'] if LXML_AVAILABLE else [])
+    checked = 0
+    for source_name, source in (('fixture', fixture), ('large', large)):
+        for name, tei_xml in variants(source):
+            expected = extract_metadata_multi_pass(ET.fromstring(tei_xml))
+            for backend in backends:
+                actual = extract_metadata_single_pass(parse_tei(tei_xml, backend=backend))
+                if actual != expected:
+                    diff = [k for k in expected if expected.get(k) != actual.get(k)]
+                    print(f"❌ Mismatch on {source_name}/{name} ({backend}): {diff}")
+                    sys.exit(1)
+                checked += 1
+    print(f"✅ Output matches the reference on {checked} TEI variant/backend combinations")
+
+    root = ET.fromstring(large)
+    elements = sum(1 for _ in root.iter())
+    print(f"Large TEI: {len(large) / 1e6:.2f} MB, {elements} elements\n")
+
+    report = {
+        'parse (etree)': summarize(best_of(lambda: parse_tei(large, backend='etree'), args.repeat)),
+        'multi-pass fields': summarize(best_of(lambda: extract_metadata_multi_pass(root), args.repeat)),
+        'single-pass fields': summarize(best_of(lambda: extract_metadata_single_pass(root), args.repeat)),
+    }
+    if LXML_AVAILABLE:
+        lxml_root = parse_tei(large, backend='lxml')
+        report['parse (lxml)'] = summarize(best_of(lambda: parse_tei(large, backend='lxml'), args.repeat))
+        report['xpath fields (lxml)'] = summarize(
+            best_of(lambda: extract_metadata_single_pass(lxml_root), args.repeat)
+        )
+    print_table(report)
+
+    parse = report['parse (etree)']['p50']
+    multi = report['multi-pass fields']['p50']
+    single = report['single-pass fields']['p50']
+    print(f"\nSpeedup vs multi-pass (p50): single-pass fields {multi / single:.1f}x, "
+          f"including the parse {(parse + multi) / (parse + single):.2f}x")
+    if LXML_AVAILABLE:
+        lxml_parse = report['parse (lxml)']['p50']
+        xpath = report['xpath fields (lxml)']['p50']
+        print(f"Speedup vs multi-pass (p50): lxml XPath fields {multi / xpath:.1f}x, "
+              f"including the parse {(parse + multi) / (lxml_parse + xpath):.2f}x")
+
+    header_only_report(args.repeat)
+    body_text_report(large, backends, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
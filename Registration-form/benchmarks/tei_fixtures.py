@@ -0,0 +1,68 @@
+"""
+Synthetic GROBID TEI of configurable size, for parser benchmarks.
+
+Real long papers are mostly body paragraphs and <biblStruct> references;
+``make_large_tei`` grows the canned fixture with both so extraction cost
+can be measured on megabyte-sized TEI without shipping such files.
+"""
+import random
+import re
+from xml.sax.saxutils import escape
+
+from mock_grobid import load_fixture_tei
+
+_WORDS = (
+    "pairs trading arbitrage portfolio return spread stock market price "
+    "volatility equity strategy risk factor model data sample period mean "
+    "reversion liquidity cost bootstrap excess profit trade index evidence"
+).split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = ' '.join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def _paragraph(rng: random.Random, number: int) -> str:
+    sentences = ' '.join(_sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(3, 7)))
+    return (
+        f'\t\t\t\t<p>{escape(sentences)} <ref type="bibr" target="#b{number % 40}">(Author, {1960 + number % 40})</ref> '
+        f'<formula xml:id="formula_{number}">x_{number} = y</formula></p>'
+    )
+
+
+def _reference(rng: random.Random, number: int) -> str:
+    authors = ''.join(
+        '<author><persName><forename type="first">{}</forename><surname>{}</surname></persName></author>'.format(
+            rng.choice(['A.', 'B.', 'Carol', 'David', 'E.']), rng.choice(_WORDS).title()
+        )
+        for _ in range(rng.randint(1, 4))
+    )
+    return f'''				<biblStruct xml:id="b{number}">
+					<analytic>
+						<title level="a" type="main">{escape(_sentence(rng, rng.randint(4, 12)))}</title>
+						{authors}
+					</analytic>
+					<monogr>
+						<title level="j">{rng.choice(['Journal of Finance', 'Review of Financial Studies', 'Econometrica'])}</title>
+						<imprint>
+							<biblScope unit="volume">{rng.randint(1, 60)}</biblScope>
+							<biblScope unit="page" from="{number}" to="{number + 20}" />
+							<date type="published" when="{1950 + number % 70}" />
+						</imprint>
+					</monogr>
+				</biblStruct>'''
+
+
+def make_large_tei(paragraphs: int = 400, references: int = 300, seed: int = 7) -> str:
+    """
+    Return the TA.tei.xml fixture with `paragraphs` extra body paragraphs
+    and `references` extra bibliography entries appended.
+    """
+    rng = random.Random(seed)
+    tei_xml = load_fixture_tei()
+    body = '\n'.join(_paragraph(rng, i) for i in range(paragraphs))
+    refs = '\n'.join(_reference(rng, i) for i in range(100, 100 + references))
+    tei_xml = re.sub(r'(\s*</div>\s*</body>)', '\n' + body.replace('\\', r'\\') + r'\1', tei_xml, count=1)
+    tei_xml = tei_xml.replace('</listBibl>', refs + '\n\t\t\t\t</listBibl>', 1)
+    return tei_xml
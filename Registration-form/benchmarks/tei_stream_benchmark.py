@@ -0,0 +1,100 @@
+"""
+Benchmark parsing GROBID TEI while it downloads against parsing it after.
+
+A mock GROBID serves a large synthetic TEI over a throttled link. Three
+ways of getting metadata out of one response are timed from the request
+to the result:
+
+    buffered        parse_pdf_with_grobid, then extract_metadata_from_tei
+    streamed        stream_pdf_with_grobid(...).document(): parsed as it arrives
+    header + close  stream_pdf_with_grobid(...).header(), then close
+
+after checking that the streamed results match the buffered ones.
+
+Examples:
+    python benchmarks/tei_stream_benchmark.py
+    python benchmarks/tei_stream_benchmark.py --bandwidth 5 --paragraphs 4000 --references 3000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_utils import print_table, summarize
+from mock_grobid import MockGrobidServer
+from tei_fixtures import make_large_tei
+
+from src.parser.grobid_client import (
+    extract_metadata_from_tei, get_grobid_client, parse_pdf_with_grobid, stream_pdf_with_grobid
+)
+
+PDF = b'%PDF-1.4 benchmark placeholder'
+
+
+def buffered(server: str, client) -> dict:
+    tei_xml = parse_pdf_with_grobid(PDF, server, client=client)
+    return extract_metadata_from_tei(tei_xml)
+
+
+def streamed(server: str, client) -> dict:
+    with stream_pdf_with_grobid(PDF, server, client=client) as tei_stream:
+        return extract_metadata_from_tei(tei_stream.document())
+
+
+def header_and_close(server: str, client) -> dict:
+    with stream_pdf_with_grobid(PDF, server, client=client) as tei_stream:
+        return extract_metadata_from_tei(tei_stream.header())
+
+
+def timings(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streamed vs buffered TEI parsing")
+    parser.add_argument("--paragraphs", type=int, default=2000, help="Body paragraphs to add to the fixture")
+    parser.add_argument("--references", type=int, default=1500, help="References to add to the fixture")
+    parser.add_argument("--bandwidth", type=float, default=20.0, help="Mock response bandwidth in MB/s (0: unthrottled)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock processing time in seconds")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed requests per method")
+    args = parser.parse_args()
+
+    tei_xml = make_large_tei(args.paragraphs, args.references)
+    with MockGrobidServer(tei_xml=tei_xml, latency=args.latency, bandwidth=args.bandwidth * 1e6) as mock:
+        client = get_grobid_client(mock.url)
+
+        expected = buffered(mock.url, client)
+        if streamed(mock.url, client) != expected:
+            print("❌ Streamed metadata differs from the buffered parse")
+            sys.exit(1)
+        expected_header = extract_metadata_from_tei(parse_pdf_with_grobid(PDF, mock.url, client=client),
+                                                    header_only=True)
+        if header_and_close(mock.url, client) != expected_header:
+            print("❌ Streamed header differs from the header-only parse")
+            sys.exit(1)
+        print("✅ Streamed metadata matches the buffered parse")
+        print(f"TEI: {len(tei_xml) / 1e6:.2f} MB at "
+              f"{f'{args.bandwidth:g} MB/s' if args.bandwidth else 'full speed'}\n")
+
+        report = {
+            'buffered': summarize(timings(lambda: buffered(mock.url, client), args.repeat)),
+            'streamed': summarize(timings(lambda: streamed(mock.url, client), args.repeat)),
+            'header + close': summarize(timings(lambda: header_and_close(mock.url, client), args.repeat)),
+        }
+        print_table(report)
+        print(f"\nMock GROBID requests: {mock.snapshot()}")
+
+    base = report['buffered']['p50']
+    print(f"Speedup vs buffered (p50): streamed {base / report['streamed']['p50']:.2f}x, "
+          f"header + close {base / report['header + close']['p50']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@
 import sys
 import os
 import argparse
+import asyncio
 import configparser
+from typing import List
 
 # Add src to path BEFORE any other imports from src
 project_root = os.path.dirname(os.path.abspath(__file__))
@@ -19,8 +21,14 @@ print(f"DEBUG: sys.path = {sys.path[:3]}")  # Show first 3 paths
 
 # Now import from src
 try:
-    from src.parser.grobid_client import parse_pdf_with_grobid, extract_metadata_from_tei
-    from src.parser.email_extractor import extract_full_text, find_emails
+    from src.parser.grobid_client import (
+        parse_pdf_with_grobid, parse_many, extract_metadata_from_tei, stream_pdf_with_grobid
+    )
+    from src.parser.grobid_pool import get_grobid_pool
+    from src.parser.tei_cache import get_tei_cache
+    from src.parser.text_cache import get_text_cache
+    from src.parser.tei_document import as_tei_document
+    from src.parser.email_extractor import find_paper_emails
     from src.utils.file_utils import save_to_json, save_to_csv
     print("DEBUG: All imports successful!")
 except ImportError as e:
@@ -32,32 +40,99 @@ except ImportError as e:
     sys.exit(1)
 
 
-def main(pdf_path: str, output_dir: str):
+def load_grobid_client(min_pool_size: int = 0):
     """
-    Main function to orchestrate the PDF parsing pipeline.
+    Read the GROBID settings from config/config.ini and return the server
+    setting together with the shared endpoint pool. `server` may list
+    several comma-separated GROBID servers.
     """
-    # Load Configuration
     config = configparser.ConfigParser()
     config.read('config/config.ini')
     grobid_server = config.get('GROBID', 'server', fallback='http://localhost:8070')
+    pool_size = max(config.getint('GROBID', 'pool_size', fallback=10), min_pool_size)
+    return grobid_server, get_grobid_pool(grobid_server, pool_size=pool_size)
+
+
+def main(pdf_path: str, output_dir: str, use_cache: bool = True, header_only: bool = False,
+         stream: bool = False):
+    """
+    Main function to orchestrate the PDF parsing pipeline.
+
+    With ``stream`` the TEI is parsed while GROBID's response downloads; in
+    header-only mode the download stops once the header has been parsed.
+    """
+    # Load Configuration
+    grobid_server, grobid_client = load_grobid_client()
+    tei_cache = get_tei_cache() if use_cache else None
+    text_cache = get_text_cache() if use_cache else None
 
     print(f"Processing file: {pdf_path}")
 
     # Step 1: Parse PDF with GROBID
     try:
         print("Step 1: Parsing with GROBID...")
-        tei_xml = parse_pdf_with_grobid(pdf_path, grobid_server)
-        metadata = extract_metadata_from_tei(tei_xml)
+        if stream:
+            with stream_pdf_with_grobid(
+                pdf_path, grobid_server, client=grobid_client, cache=tei_cache, header_only=header_only
+            ) as tei_stream:
+                tei_doc = tei_stream.header() if header_only else tei_stream.document()
+                metadata = extract_metadata_from_tei(tei_doc)
+        else:
+            tei_xml = parse_pdf_with_grobid(
+                pdf_path, grobid_server, client=grobid_client, cache=tei_cache, header_only=header_only
+            )
+            tei_doc = as_tei_document(tei_xml, header_only=header_only)
+            metadata = extract_metadata_from_tei(tei_doc)
         print("GROBID parsing successful.")
     except Exception as e:
         print(f"Error during GROBID processing: {e}")
         return
 
+    finish_pipeline(pdf_path, metadata, output_dir, tei_doc, text_cache)
+
+
+def main_batch(pdf_paths: List[str], output_dir: str, concurrency: int,
+               use_cache: bool = True, header_only: bool = False):
+    """
+    Run the pipeline over many PDFs, keeping up to `concurrency` GROBID
+    requests in flight. Papers are finished in the order GROBID returns them.
+    """
+    grobid_server, grobid_client = load_grobid_client(min_pool_size=concurrency)
+    tei_cache = get_tei_cache() if use_cache else None
+    text_cache = get_text_cache() if use_cache else None
+
+    print(f"Processing {len(pdf_paths)} files with up to {concurrency} concurrent GROBID requests")
+
+    async def run() -> int:
+        succeeded = 0
+        async for pdf_path, tei_xml, error in parse_many(
+            pdf_paths, grobid_server, concurrency=concurrency, client=grobid_client,
+            cache=tei_cache, header_only=header_only
+        ):
+            print(f"Processing file: {pdf_path}")
+            if error is not None:
+                print(f"Error during GROBID processing: {error}")
+                continue
+            tei_doc = as_tei_document(tei_xml, header_only=header_only)
+            finish_pipeline(pdf_path, extract_metadata_from_tei(tei_doc), output_dir, tei_doc, text_cache)
+            succeeded += 1
+        return succeeded
+
+    succeeded = asyncio.run(run())
+    print(f"Finished: {succeeded}/{len(pdf_paths)} files processed successfully.")
+
+
+def finish_pipeline(pdf_path: str, metadata: dict, output_dir: str, tei_doc=None, text_cache=None):
+    """
+    Steps 2-3 of the pipeline: find emails, save outputs and print a summary.
+    The authors' emails are taken from `tei_doc` (GROBID's TEI) when it has any;
+    otherwise the PDF is scanned, reusing its text from `text_cache` if cached.
+    """
     # Step 2: Extract text and emails
     try:
         print("Step 2: Extracting text and finding emails...")
-        full_text = extract_full_text(pdf_path)
-        emails = find_emails(full_text)
+        # TEI <email>s first; the PDF's first pages (then all of it) only if there are none
+        emails = find_paper_emails(pdf_path, tei_doc, cache=text_cache)
         metadata['emails'] = emails
         print(f"Found {len(emails)} email(s).")
     except Exception as e:
@@ -82,15 +157,24 @@ def main(pdf_path: str, output_dir: str):
     print(f"Title: {metadata.get('title')}")
     print(f"Authors: {', '.join(metadata.get('authors', []))}")
     print(f"Emails: {', '.join(metadata.get('emails', []))}")
-    print(f"Abstract: {metadata.get('abstract', 'N/A')[:200]}...")
+    print(f"Abstract: {(metadata.get('abstract') or 'N/A')[:200]}...")
     print("----------------------\n")
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Extract metadata from a PDF")
-    parser.add_argument("pdf_path", type=str, help="Path to the input PDF")
+    parser = argparse.ArgumentParser(description="Extract metadata from one or more PDFs")
+    parser.add_argument("pdf_path", type=str, nargs="+", help="Path(s) to the input PDF(s)")
     parser.add_argument("--output_dir", type=str, default="data/output", help="Directory to save outputs")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum concurrent GROBID requests in batch mode")
+    parser.add_argument("--no_cache", action="store_true", help="Skip the TEI and PDF text caches")
+    parser.add_argument("--header_only", action="store_true", help="Parse only the header (faster; no body_text)")
+    parser.add_argument("--stream", action="store_true", help="Parse the TEI while it downloads (single file only)")
     args = parser.parse_args()
 
     os.makedirs(args.output_dir, exist_ok=True)
-    main(args.pdf_path, args.output_dir)
\ No newline at end of file
+    if len(args.pdf_path) == 1:
+        main(args.pdf_path[0], args.output_dir, use_cache=not args.no_cache, header_only=args.header_only,
+             stream=args.stream)
+    else:
+        main_batch(args.pdf_path, args.output_dir, args.concurrency,
+                   use_cache=not args.no_cache, header_only=args.header_only)
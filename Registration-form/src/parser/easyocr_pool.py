@@ -0,0 +1,166 @@
+"""
+Process-wide pool of warm EasyOCR readers with batched inference
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List, Optional
+
+import numpy as np
+from PIL import Image
+
+EASYOCR_POOL_SIZE = int(os.environ.get("EASYOCR_POOL_SIZE", "1"))
+EASYOCR_LANGUAGES = [lang.strip() for lang in os.environ.get("EASYOCR_LANGUAGES", "en").split(',') if lang.strip()]
+# Receipts one reader recognizes in a single call, and how long (seconds)
+# it waits for more to arrive once it has one (0: only what is queued)
+EASYOCR_BATCH_SIZE = int(os.environ.get("EASYOCR_BATCH_SIZE", "8"))
+EASYOCR_BATCH_WAIT = float(os.environ.get("EASYOCR_BATCH_WAIT", "0"))
+
+
+def as_ocr_array(image) -> np.ndarray:
+    """
+    Returns the image as the uint8 array EasyOCR works on, in OpenCV's BGR
+    channel order (what it decodes encoded images to).
+
+    Args:
+        image: A numpy array (used as it is: BGR, BGRA or grayscale, as from
+            cv2.imread), a PIL image, a file path or a binary file-like object.
+    """
+    if isinstance(image, np.ndarray):
+        return image
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+
+
+class _Request:
+    __slots__ = ('image', 'future')
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self.future: Future = Future()
+
+
+class EasyOcrPool:
+    """
+    A fixed number of EasyOCR readers, loaded once and kept warm.
+
+    ``easyocr.Reader`` loads its detection and recognition models from disk
+    (seconds and hundreds of MB each time). The pool builds `size` readers
+    on first use, or on ``warm_up()`` at startup, and serves every receipt
+    from them. Each reader has its own thread; when several receipts are
+    queued it takes up to `batch_size` at once and recognizes those of the
+    same size in a single ``readtext_batched`` call.
+    """
+
+    def __init__(self, size: int = EASYOCR_POOL_SIZE, languages: Optional[List[str]] = None,
+                 batch_size: int = EASYOCR_BATCH_SIZE, batch_wait: float = EASYOCR_BATCH_WAIT,
+                 **reader_options):
+        self.size = max(1, size)
+        self.languages = languages or EASYOCR_LANGUAGES
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self.reader_options = reader_options
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _start(self):
+        with self._lock:
+            if self._started:
+                return
+            # Imported here: EasyOCR (and torch) are optional and heavy
+            import easyocr
+
+            readers = [easyocr.Reader(self.languages, **self.reader_options) for _ in range(self.size)]
+            for number, reader in enumerate(readers):
+                threading.Thread(target=self._serve, args=(reader,), name=f'easyocr-{number}', daemon=True).start()
+            self._started = True
+
+    def warm_up(self, background: bool = False):
+        """
+        Load the readers now instead of on the first receipt. With
+        `background`, load them in a daemon thread and return at once.
+        """
+        if self._started:
+            return
+        if not background:
+            self._start()
+            return
+
+        def load():
+            try:
+                self._start()
+            except Exception as e:
+                print(f"⚠️ EasyOCR warm-up failed: {e}")
+
+        threading.Thread(target=load, name='easyocr-warm-up', daemon=True).start()
+
+    def submit(self, image) -> Future:
+        """Queue one image (see ``as_ocr_array``); the future resolves to EasyOCR's readtext() result."""
+        self._start()
+        request = _Request(as_ocr_array(image))
+        self._queue.put(request)
+        return request.future
+
+    def readtext(self, image) -> List[Any]:
+        """EasyOCR's ``readtext(image)``: a list of (box, text, confidence)."""
+        return self.submit(image).result()
+
+    def _next_batch(self) -> List[_Request]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                remaining = deadline - time.monotonic()
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _serve(self, reader):
+        while True:
+            batch = self._next_batch()
+            # readtext_batched needs images of one size (it would resize the
+            # rest), so only receipts with the same shape share a call
+            groups = {}
+            for request in batch:
+                if request.future.set_running_or_notify_cancel():
+                    groups.setdefault(request.image.shape, []).append(request)
+            for requests in groups.values():
+                if len(requests) > 1:
+                    try:
+                        results = reader.readtext_batched([request.image for request in requests])
+                    except Exception as e:
+                        # One unreadable receipt must not fail the others
+                        print(f"⚠️ EasyOCR batch of {len(requests)} failed, reading one by one: {e}")
+                    else:
+                        for request, result in zip(requests, results):
+                            request.future.set_result(result)
+                        continue
+                for request in requests:
+                    try:
+                        request.future.set_result(reader.readtext(request.image))
+                    except Exception as e:
+                        request.future.set_exception(e)
+
+
+_default_pool: Optional[EasyOcrPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_easyocr_pool() -> EasyOcrPool:
+    """
+    Return the process-wide EasyOCR pool (configured via EASYOCR_POOL_SIZE,
+    EASYOCR_LANGUAGES, EASYOCR_BATCH_SIZE and EASYOCR_BATCH_WAIT). The
+    readers are loaded on first use.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = EasyOcrPool()
+    return _default_pool
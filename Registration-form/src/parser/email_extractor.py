@@ -1,88 +1,568 @@
 """
 Email extractor for PDF research papers
 """
+import io
+import multiprocessing
+import os
 import re
-from typing import List
+import string
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Union
+from urllib.parse import unquote
+
+from ..utils.pdf_source import PdfSource, as_buffer
+from .tei_document import TeiDocument, as_tei_document
+from .text_cache import TextCache
 
 try:
     import fitz  # PyMuPDF
     PYMUPDF_AVAILABLE = True
 except ImportError:
     PYMUPDF_AVAILABLE = False
+
+try:
+    from PyPDF2 import PdfReader, __version__ as PYPDF2_VERSION
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
+
+#  email regex pattern
+# Matches: username@domain.tld
+EMAIL_REGEX = re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+
+# Character classes of EMAIL_REGEX, as tables for str.strip()
+_LOCAL_CHARS = string.ascii_letters + string.digits + '._%+-'
+_DOMAIN_CHARS = string.ascii_letters + string.digits + '.-'
+_TLD_CHARS = string.ascii_letters
+_LOCAL_SET = frozenset(_LOCAL_CHARS)
+
+# Characters looked at per step when expanding around an '@'
+_SCAN_WINDOW = 64
+
+# "{alice, bob}@uni.edu": several authors sharing one domain
+GROUPED_EMAIL_REGEX = re.compile(r"\{([^{}@]+)\}\s*@\s*([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})")
+
+# Author emails sit on the first page or in the footnotes of the first two
+HEADER_PAGES = 2
+
+# Which pages to read: all (None), the first N (int) or these 0-based indices
+PageSelection = Optional[Union[int, Iterable[int]]]
+
+# From this many pages on, PyMuPDF extraction is spread over worker processes
+PARALLEL_PAGE_THRESHOLD = int(os.environ.get("PDF_PARALLEL_PAGES", "200"))
+PARALLEL_WORKERS = int(os.environ.get("PDF_PARALLEL_WORKERS", "0")) or os.cpu_count() or 1
+
+# Page ranges per worker: small enough to even out slow pages
+_RANGES_PER_WORKER = 4
+
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
+
+def _page_numbers(page_count: int, pages: PageSelection) -> Iterable[int]:
+    if pages is None:
+        return range(page_count)
+    if isinstance(pages, int):
+        return range(min(pages, page_count))
+    return (number for number in pages if 0 <= number < page_count)
+
+
+def _open_pymupdf(pdf_path: PdfSource, buffer):
+    if buffer is None:
+        return fitz.open(pdf_path)
+    return fitz.open(stream=buffer, filetype="pdf")
+
+
+def _iter_pymupdf(pdf_path: PdfSource, buffer, pages: PageSelection,
+                  parallel: Optional[bool] = False) -> Iterator[str]:
+    doc = _open_pymupdf(pdf_path, buffer)
+    numbers = list(_page_numbers(doc.page_count, pages))
+    if _use_parallel(len(numbers), parallel):
+        # The workers open their own handles
+        doc.close()
+        read = 0
+        try:
+            for page_text in _iter_pymupdf_parallel(pdf_path, buffer, numbers):
+                read += 1
+                yield page_text
+            return
+        except BrokenProcessPool as e:
+            # A worker died (killed, out of memory): the pool has been
+            # discarded, read the remaining pages here
+            print(f"⚠️ Page pool failed, extracting the remaining pages in this process: {e}")
+        numbers = numbers[read:]
+        doc = _open_pymupdf(pdf_path, buffer)
     try:
-        from PyPDF2 import PdfReader
-        PYPDF2_AVAILABLE = True
-    except ImportError:
-        PYPDF2_AVAILABLE = False
+        for number in numbers:
+            yield doc[number].get_text()
+    finally:
+        doc.close()
 
 
-def extract_full_text(pdf_path: str) -> str:
+def get_page_pool() -> ProcessPoolExecutor:
     """
-    Extracts all text content from a PDF file.
+    Return the process-wide pool of PARALLEL_WORKERS text extraction
+    processes, started on first use.
+    """
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = ProcessPoolExecutor(max_workers=PARALLEL_WORKERS, mp_context=_worker_context())
+    return _page_pool
+
+
+def _worker_context():
+    # Not fork: the web app is multi-threaded (a child could inherit a held
+    # lock) and may have native thread pools initialized
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _discard_page_pool(executor: ProcessPoolExecutor):
+    """Drop a broken page pool, so the next parallel read starts a new one."""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is executor:
+            _page_pool = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_page_range(pdf_path: str, numbers: Sequence[int]) -> List[str]:
+    """Worker: the text of the given pages, from its own document handle."""
+    doc = fitz.open(pdf_path)
+    try:
+        return [doc[number].get_text() for number in numbers]
+    finally:
+        doc.close()
+
+
+def _page_ranges(numbers: Sequence[int], workers: int) -> List[Sequence[int]]:
+    size = -(-len(numbers) // (workers * _RANGES_PER_WORKER))
+    return [numbers[i:i + size] for i in range(0, len(numbers), size)]
+
+
+def _iter_pymupdf_parallel(pdf_path: PdfSource, buffer, numbers: Sequence[int]) -> Iterator[str]:
+    """
+    Page texts from the page pool, in page order. Document handles cannot be
+    shared, so every range is extracted from its own handle: paths are opened
+    directly, in-memory PDFs are written once to a temporary file that all
+    workers open (and the OS page cache shares).
+    """
+    spilled = None
+    if buffer is not None:
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+            f.write(buffer)
+        pdf_path = spilled = f.name
+    try:
+        ranges = _page_ranges(numbers, PARALLEL_WORKERS)
+        executor = get_page_pool()
+        try:
+            # map() yields in submission order and cancels what is left on close()
+            results = executor.map(_extract_page_range, [os.fspath(pdf_path)] * len(ranges), ranges)
+            try:
+                for page_texts in results:
+                    yield from page_texts
+            finally:
+                results.close()
+        except BrokenProcessPool:
+            _discard_page_pool(executor)
+            raise
+    finally:
+        if spilled is not None:
+            os.unlink(spilled)
+
+
+def _use_parallel(page_count: int, parallel: Optional[bool]) -> bool:
+    if page_count == 0:
+        return False
+    if parallel is None:
+        return PARALLEL_WORKERS > 1 and page_count >= PARALLEL_PAGE_THRESHOLD
+    return parallel
+
+
+def _iter_pypdf2(pdf_path: PdfSource, buffer, pages: PageSelection,
+                 parallel: Optional[bool] = False) -> Iterator[str]:
+    # Always sequential: the pool is only worth it for PyMuPDF's faster pages
+    with (open(pdf_path, 'rb') if buffer is None else io.BytesIO(buffer)) as file:
+        pdf = PdfReader(file)
+        for number in _page_numbers(len(pdf.pages), pages):
+            page_text = pdf.pages[number].extract_text()
+            yield page_text + "\n" if page_text else ""
+
+
+def iter_page_text(pdf_path: PdfSource, pages: PageSelection = None,
+                   parallel: Optional[bool] = None) -> Iterator[str]:
+    """
+    Yields the text of a PDF one page at a time, so only the current page's
+    text has to be held in memory.
     Tries PyMuPDF first (better), falls back to PyPDF2.
-    
+
+    PyMuPDF documents cannot be shared between threads, so large PDFs
+    (proceedings volumes, theses) are split into page ranges that a pool
+    of worker processes extracts side by side; the pages still come out
+    in order.
+
     Args:
-        pdf_path: The file path to the PDF document.
-    
-    Returns:
-        A single string containing all text from the PDF.
+        pdf_path: The file path to the PDF document, or its content as
+            bytes, a memoryview or a binary file-like object.
+        pages: All pages (None), the first N pages (an int) or the given
+            0-based page numbers (e.g. a range); pages past the end are
+            skipped.
+        parallel: Use the process pool (True), read in this process
+            (False), or decide by page count (None: from
+            PARALLEL_PAGE_THRESHOLD pages on, with 2+ workers)
+
+    Yields:
+        Each selected page's text, in order ("" for a page without text).
+        Every non-empty page ends with a newline, so joining them gives
+        the text of the whole document.
     """
-    #  PyMuPDF  
-    if PYMUPDF_AVAILABLE:
-        try:
-            full_text = ""
-            doc = fitz.open(pdf_path)
-            for page in doc:
-                full_text += page.get_text()
-            doc.close()
-            return full_text
-        except Exception as e:
-            print(f"⚠️ Error extracting text with PyMuPDF: {e}")
-    
+    return _iter_page_text(pdf_path, pages, parallel)
+
 
+def _backends():
+    """(name, version label, page iterator) of each installed backend, best first."""
+    if PYMUPDF_AVAILABLE:
+        yield 'PyMuPDF', f"PyMuPDF {fitz.VersionBind}", _iter_pymupdf
     if PYPDF2_AVAILABLE:
+        yield 'PyPDF2', f"PyPDF2 {PYPDF2_VERSION}", _iter_pypdf2
+
+
+def _iter_page_text(pdf_path: PdfSource, pages: PageSelection, parallel: Optional[bool],
+                    on_complete: Optional[Callable[[str], None]] = None) -> Iterator[str]:
+    """``iter_page_text``; calls ``on_complete(backend)`` once every page was read."""
+    # In-memory PDFs are opened straight from their buffer, never via disk
+    buffer = as_buffer(pdf_path)
+
+    if isinstance(pages, Iterator):
+        # A one-shot iterator could not be replayed by the fallback
+        pages = list(pages)
+
+    for name, backend, iter_pages in _backends():
+        started = False
+        page_texts = iter_pages(pdf_path, buffer, pages, parallel)
         try:
-            full_text = ""
-            with open(pdf_path, 'rb') as file:
-                pdf = PdfReader(file)
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        full_text += page_text + "\n"
-            return full_text
+            for page_text in page_texts:
+                started = True
+                yield page_text
+            if on_complete is not None:
+                on_complete(backend)
+            return
         except Exception as e:
-            print(f"⚠️ Error extracting text with PyPDF2: {e}")
-    
+            print(f"⚠️ Error extracting text with {name}: {e}")
+            if started:
+                # Pages already handed out cannot be taken back
+                return
+        finally:
+            # Closes the document as soon as the caller stops reading
+            page_texts.close()
+
     print("❌ No PDF library available (install PyMuPDF or PyPDF2)")
-    return ""
 
 
-def find_emails(text: str) -> List[str]:
+def extract_text(pdf_path: PdfSource, pages: PageSelection = None,
+                 max_chars: Optional[int] = None, parallel: Optional[bool] = None) -> str:
+    """
+    Extracts the text of the selected pages of a PDF file, reading no
+    further than needed for `max_chars` characters.
+
+    Args:
+        pdf_path: The file path to the PDF document, or its content as
+            bytes, a memoryview or a binary file-like object.
+        pages: Pages to read, as for ``iter_page_text``
+        max_chars: Stop after this many characters (None for no limit)
+        parallel: Extract with the process pool, as for ``iter_page_text``
+
+    Returns:
+        A single string containing the text of the selected pages.
+    """
+    # Collected and joined once: linear in the length of the text
+    parts = []
+    length = 0
+    for page_text in iter_page_text(pdf_path, pages, parallel):
+        parts.append(page_text)
+        length += len(page_text)
+        if max_chars is not None and length >= max_chars:
+            break
+    text = ''.join(parts)
+    return text if max_chars is None else text[:max_chars]
+
+
+def extract_full_text(pdf_path: PdfSource, parallel: Optional[bool] = None,
+                      cache: Optional[TextCache] = None) -> str:
+    """
+    Extracts all text content from a PDF file.
+    Tries PyMuPDF first (better), falls back to PyPDF2.
+
+    Args:
+        pdf_path: The file path to the PDF document, or its content as
+            bytes, a memoryview or a binary file-like object.
+        parallel: Extract with the process pool, as for ``iter_page_text``
+        cache: Reuse the text extracted from the same PDF content before
+            (looked up per installed backend, best first); a fresh
+            extraction is stored under the backend that produced it
+
+    Returns:
+        A single string containing all text from the PDF.
+    """
+    if cache is None:
+        return extract_text(pdf_path, parallel=parallel)
+
+    digest = cache.digest(pdf_path)
+    for _, backend, _ in _backends():
+        text = cache.get(pdf_path, backend, digest=digest)
+        if text is not None:
+            return text
+
+    completed_by = []
+    text = ''.join(_iter_page_text(pdf_path, None, parallel, completed_by.append))
+    # Text cut short by a failing backend is not cached
+    if completed_by:
+        cache.put(pdf_path, completed_by[0], text, digest=digest)
+    return text
+
+
+def _run_before(text: str, end: int, start: int, chars: str) -> int:
+    """Start of the run of `chars` ending at `end`, not before `start`."""
+    window = _SCAN_WINDOW
+    while True:
+        lo = max(start, end - window)
+        segment = text[lo:end]
+        kept = len(segment.rstrip(chars))
+        if kept or lo == start:
+            return lo + kept
+        window *= 2
+
+
+def _run_after(text: str, start: int, chars: str) -> int:
+    """End of the run of `chars` starting at `start`."""
+    window = _SCAN_WINDOW
+    while True:
+        hi = start + window
+        segment = text[start:hi]
+        kept = len(segment.lstrip(chars))
+        if kept or hi >= len(text):
+            return start + len(segment) - kept
+        window *= 2
+
+
+def scan_emails(text: str) -> Iterator[str]:
+    """
+    Yields exactly what ``EMAIL_REGEX.findall(text)`` returns, in order.
+
+    Instead of trying a match at every character, jumps from one '@' to
+    the next with str.find and only looks at the characters around each:
+    the local part is the run of local-part characters before the '@'
+    (not reaching back into the previous match), the domain the longest
+    prefix of the run after it that ends in "." and two or more letters.
     """
-    Finds all unique email addresses in a block of text using regex.
-    
+    find = text.find
+    previous_end = 0
+    at = find('@')
+    while at != -1:
+        if at == previous_end or text[at - 1] not in _LOCAL_SET:
+            # Nothing before this '@' could start a match: "@user", "a @ b"
+            at = find('@', at + 1)
+            continue
+        start = _run_before(text, at, previous_end, _LOCAL_CHARS)
+        if start < at:
+            domain_end = _run_after(text, at + 1, _DOMAIN_CHARS)
+            domain = text[at + 1:domain_end]
+            # The last dot with a non-empty name before it and 2+ letters after
+            # (the domain holds ASCII only, so isalpha() means [a-zA-Z])
+            dot = domain.rfind('.')
+            while dot > 0 and not (len(domain) >= dot + 3 and domain[dot + 1:dot + 3].isalpha()):
+                dot = domain.rfind('.', 0, dot)
+            if dot > 0:
+                end = _run_after(text, at + 2 + dot, _TLD_CHARS)
+                yield text[start:end]
+                previous_end = end
+                at = find('@', end)
+                continue
+        at = find('@', at + 1)
+
+
+def find_emails(text: Union[str, Iterable[str]], limit: Optional[int] = None) -> List[str]:
+    """
+    Finds all unique email addresses in a block of text: the matches of
+    EMAIL_REGEX, found with ``scan_emails``.
+
     Args:
-        text: The string to search for emails.
-    
+        text: The string to search for emails, or an iterable of strings
+            (e.g. ``iter_page_text(pdf)``) that is scanned piece by piece
+            and no further than needed.
+        limit: Stop once this many unique emails have been found
+
     Returns:
         A list of unique email addresses found in the text.
     """
     if not text:
         return []
-    
-    #  email regex pattern
-    # Matches: username@domain.tld
-    email_regex = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
-    
-    found_emails = re.findall(email_regex, text)
-    
+
+    pieces = [text] if isinstance(text, str) else text
+
     # Return unique emails (preserve order)
     seen = set()
     unique_emails = []
-    for email in found_emails:
-        email_lower = email.lower()
-        if email_lower not in seen:
-            seen.add(email_lower)
-            unique_emails.append(email)
-    
+    for piece in pieces:
+        for email in scan_emails(piece):
+            email_lower = email.lower()
+            if email_lower not in seen:
+                seen.add(email_lower)
+                unique_emails.append(email)
+                if limit is not None and len(unique_emails) >= limit:
+                    return unique_emails
+
     return unique_emails
+
+
+def find_emails_in_pdf(pdf_path: PdfSource, pages: PageSelection = None,
+                       limit: Optional[int] = None, parallel: Optional[bool] = None,
+                       cache: Optional[TextCache] = None) -> List[str]:
+    """
+    ``find_emails(extract_full_text(pdf_path))``, scanned page by page: the
+    whole text is never held at once and reading stops at `limit` emails.
+
+    Args:
+        pdf_path: The file path to the PDF document, or its content as
+            bytes, a memoryview or a binary file-like object.
+        pages: Pages to read, as for ``iter_page_text``
+        limit: Stop once this many unique emails have been found
+        parallel: Extract with the process pool, as for ``iter_page_text``;
+            by default not when a `limit` may stop the scan after a few pages
+        cache: Scan the whole text from this cache (``extract_full_text``)
+            instead of reading the pages; ignored when `pages` or `limit`
+            is given, since filling it reads every page
+
+    Returns:
+        A list of unique email addresses found in the PDF.
+    """
+    if cache is not None and pages is None and limit is None:
+        return find_emails(extract_full_text(pdf_path, parallel=parallel, cache=cache))
+    if parallel is None and limit is not None:
+        parallel = False
+    page_texts = iter_page_text(pdf_path, pages, parallel)
+    try:
+        return find_emails(page_texts, limit=limit)
+    finally:
+        # Closes the document now if the scan stopped early
+        page_texts.close()
+
+
+def expand_grouped_emails(text: str) -> str:
+    """Rewrites "{alice, bob}@uni.edu" as "alice@uni.edu bob@uni.edu"."""
+    def expand(match):
+        names = re.split(r"[\s,;|]+", match.group(1).strip())
+        return ' '.join(f"{name}@{match.group(2)}" for name in names if name)
+    return GROUPED_EMAIL_REGEX.sub(expand, text)
+
+
+def _mailto_addresses(uri: str) -> str:
+    """The addresses of a mailto: link, one per line ("" for other links)."""
+    if not uri or not uri.lower().startswith('mailto:'):
+        return ""
+    addresses = unquote(uri[len('mailto:'):].split('?', 1)[0])
+    return '\n'.join(address.strip() for address in addresses.split(',')) + '\n'
+
+
+def _iter_header_text(pdf_path: PdfSource, pages: int) -> Iterator[str]:
+    """
+    Text blocks and mailto: link targets of the first `pages` pages, with
+    grouped addresses expanded.
+    """
+    doc = None
+    if PYMUPDF_AVAILABLE:
+        buffer = as_buffer(pdf_path)
+        try:
+            if buffer is None:
+                doc = fitz.open(pdf_path)
+            else:
+                doc = fitz.open(stream=buffer, filetype="pdf")
+        except Exception as e:
+            print(f"⚠️ Error opening PDF with PyMuPDF: {e}")
+
+    if doc is None:
+        # Plain page text; links are only available through PyMuPDF
+        for page_text in iter_page_text(pdf_path, pages):
+            yield expand_grouped_emails(page_text)
+        return
+
+    try:
+        for number in _page_numbers(doc.page_count, pages):
+            page = doc[number]
+            for block in page.get_text("blocks"):
+                if block[6] == 0:  # text, not image
+                    yield expand_grouped_emails(block[4])
+            for link in page.get_links():
+                yield _mailto_addresses(link.get('uri'))
+    finally:
+        doc.close()
+
+
+def find_author_emails(pdf_path: PdfSource, header_pages: int = HEADER_PAGES,
+                       escalate: bool = True, limit: Optional[int] = None,
+                       cache: Optional[TextCache] = None) -> List[str]:
+    """
+    Finds the authors' email addresses, reading only the start of the paper.
+
+    Only the first `header_pages` pages are read: their text blocks
+    (with "{alice, bob}@uni.edu" expanded) and their mailto: links. That
+    skips the reference list and its unrelated addresses, and most of
+    the document. Only if nothing is found there is the whole PDF
+    scanned, as ``find_emails_in_pdf`` does.
+
+    Args:
+        pdf_path: The file path to the PDF document, or its content as
+            bytes, a memoryview or a binary file-like object.
+        header_pages: How many leading pages to read
+        escalate: Fall back to scanning every page when the first pages
+            have no email
+        limit: Stop once this many unique emails have been found
+        cache: Text cache for the whole-PDF scan, as for ``find_emails_in_pdf``
+
+    Returns:
+        A list of unique email addresses.
+    """
+    header_text = _iter_header_text(pdf_path, header_pages)
+    try:
+        emails = find_emails(header_text, limit=limit)
+    finally:
+        header_text.close()
+    if emails or not escalate:
+        return emails
+    return find_emails_in_pdf(pdf_path, limit=limit, cache=cache)
+
+
+def find_paper_emails(pdf_path: PdfSource, tei: Optional[Union[str, bytes, TeiDocument]] = None,
+                      header_pages: int = HEADER_PAGES, limit: Optional[int] = None,
+                      cache: Optional[TextCache] = None) -> List[str]:
+    """
+    Finds the authors' email addresses, from GROBID's TEI when it has them.
+
+    GROBID already puts each author's <email> in the TEI header, so the
+    PDF is only opened again (``find_author_emails``) when the TEI is
+    missing, malformed or has no author email. Addresses from the TEI
+    go through ``find_emails``, so they are matched and de-duplicated
+    the same way as text from the PDF.
+
+    Args:
+        pdf_path: The file path to the PDF document, or its content as
+            bytes, a memoryview or a binary file-like object.
+        tei: GROBID's TEI XML for this PDF, or a TeiDocument of it
+        header_pages: How many leading pages the PDF fallback reads
+        limit: Stop once this many unique emails have been found
+        cache: Text cache for the whole-PDF scan, as for ``find_emails_in_pdf``
+
+    Returns:
+        A list of unique email addresses.
+    """
+    if tei is not None:
+        tei_doc = as_tei_document(tei, header_only=True)
+        if tei_doc.parse_error is None:
+            emails = find_emails(tei_doc.author_emails, limit=limit)
+            if emails:
+                return emails
+    return find_author_emails(pdf_path, header_pages=header_pages, limit=limit, cache=cache)
@@ -1,76 +1,469 @@
 """
 GROBID client for parsing PDF files 
 """
+import asyncio
+import os
 import requests
+import threading
 import time
-from typing import Dict, List, Optional
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
 from xml.etree import ElementTree as ET
 
+from ..utils.pdf_source import PdfSource, as_buffer, is_path, pdf_size
+from .retry_policy import Deadline, GrobidDeadlineExceeded, RetryPolicy
+from .tei_cache import TeiCache
+from .tei_document import BODY_TEXT_LIMIT, TeiDocument, as_tei_document
+from .tei_stream import STREAM_CHUNK_SIZE, TeiStream
+from .tei_extractor import extract_text_from_element
 
-def parse_pdf_with_grobid(pdf_path: str, grobid_server: str, max_retries: int = 3) -> str:
+
+# Keep-alive connections kept per GROBID host (override with GROBID_POOL_SIZE)
+DEFAULT_POOL_SIZE = int(os.environ.get("GROBID_POOL_SIZE", "10"))
+
+# GROBID services: full text segments the whole paper, header only the front matter
+FULLTEXT_SERVICE = 'processFulltextDocument'
+HEADER_SERVICE = 'processHeaderDocument'
+
+# Shared so every call learns from the latencies observed by the others
+DEFAULT_RETRY_POLICY = RetryPolicy(deadline=float(os.environ.get("GROBID_DEADLINE", "120")))
+
+
+class _MultipartBody:
+    """
+    Streaming ``multipart/form-data`` body carrying one PDF as the ``input`` field.
+
+    It has a known length and is read in blocks, so requests streams it
+    to the socket straight from the caller's buffer (or from the file on
+    disk) instead of first assembling a copy of the whole request body.
+    """
+
+    def __init__(self, pdf: PdfSource, field: str = 'input', filename: str = 'document.pdf'):
+        boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        head = (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            'Content-Type: application/pdf\r\n\r\n'
+        ).encode('ascii')
+        tail = f'\r\n--{boundary}--\r\n'.encode('ascii')
+
+        buffer = as_buffer(pdf)
+        if buffer is None:
+            self._file = open(pdf, 'rb')
+            content = self._file
+            content_length = os.fstat(self._file.fileno()).st_size
+        else:
+            self._file = None
+            content = buffer
+            content_length = buffer.nbytes
+
+        self._segments = [memoryview(head), content, memoryview(tail)]
+        self._length = len(head) + content_length + len(tail)
+        self._index = 0
+        self._offset = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1):
+        if size is None or size < 0:
+            return b''.join(iter(lambda: self.read(1024 * 1024), b''))
+
+        while self._index < len(self._segments):
+            segment = self._segments[self._index]
+            if hasattr(segment, 'read'):
+                chunk = segment.read(size)
+            else:
+                chunk = segment[self._offset:self._offset + size]
+                self._offset += len(chunk)
+            if chunk:
+                return chunk
+            self._index += 1
+            self._offset = 0
+        return b''
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class GrobidClient:
+    """
+    Reusable GROBID client that owns a pooled, keep-alive HTTP session.
+
+    Every call borrows a warm connection from the pool, so repeated papers
+    do not pay a fresh TCP+TLS handshake to the GROBID server.
+    """
+
+    def __init__(self, grobid_server: str, pool_size: int = DEFAULT_POOL_SIZE):
+        self.grobid_server = grobid_server.rstrip('/')
+        self.pool_size = pool_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def post(self, service: str, files: Optional[dict] = None, timeout: float = 60,
+             pdf: Optional[PdfSource] = None, deadline: Optional[Deadline] = None,
+             **kwargs) -> requests.Response:
+        """
+        POST to a GROBID API service (e.g. ``processFulltextDocument``).
+
+        Args:
+            service: GROBID service name under ``/api/``
+            files: Multipart files mapping passed through to requests
+            timeout: Request timeout in seconds
+            pdf: PDF to upload as the ``input`` field (path, bytes,
+                memoryview or file-like), streamed without extra copies
+            deadline: The calling retry loop's time budget; the timeout
+                is cut to what is left of it
+
+        Returns:
+            The raw ``requests.Response``
+        """
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+            if timeout <= 0:
+                raise requests.exceptions.Timeout(f"No time left to call GROBID {service}")
+        url = f"{self.grobid_server}/api/{service}"
+        if pdf is None:
+            return self.session.post(url, files=files, timeout=timeout, **kwargs)
+
+        body = _MultipartBody(pdf)
+        try:
+            return self.session.post(
+                url, data=body, headers={'Content-Type': body.content_type}, timeout=timeout, **kwargs
+            )
+        finally:
+            body.close()
+
+    def close(self):
+        """Close every pooled connection held by this client."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_clients: Dict[str, GrobidClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_grobid_client(grobid_server: str, pool_size: Optional[int] = None) -> GrobidClient:
+    """
+    Return the process-wide shared client for a GROBID server.
+
+    The first caller for a server decides the pool size; later callers
+    (app.py sessions, main.py, image extraction) reuse the same warm pool.
+    """
+    key = grobid_server.rstrip('/')
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = GrobidClient(key, pool_size or DEFAULT_POOL_SIZE)
+            _clients[key] = client
+    return client
+
+
+def parse_pdf_with_grobid(
+    pdf_path: PdfSource,
+    grobid_server: str,
+    max_retries: int = 3,
+    client: Optional[GrobidClient] = None,
+    cache: Optional[TeiCache] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    header_only: bool = False
+) -> str:
     """
     Send PDF to GROBID server and get TEI XML response.
     
+    With ``header_only`` GROBID's ``processHeaderDocument`` is used: it only
+    parses the front matter (title, authors, affiliations, abstract,
+    keywords), which is several times faster on long papers. The TEI has
+    no ``<body>``, so ``body_text`` comes back empty; use
+    ``fetch_body_text`` when the body is actually needed.
+    
     Args:
-        pdf_path: Path to PDF file
+        pdf_path: Path to PDF file, or the PDF content as bytes, a
+            memoryview or a binary file-like object (e.g. a Streamlit upload)
         grobid_server: GROBID server URL
         max_retries: Number of retry attempts for timeout/503 errors
+        client: Client to send the request with (defaults to the shared
+            pooled client for ``grobid_server``)
+        cache: Optional TEI cache; a hit returns without calling GROBID
+        retry_policy: Backoff, timeout and deadline settings (defaults to
+            the shared ``DEFAULT_RETRY_POLICY``)
+        header_only: Parse only the header instead of the full text
     
     Returns:
         TEI XML string
     
     Raises:
-        requests.exceptions.HTTPError: If request fails after all retries
+        requests.exceptions.HTTPError: If GROBID rejects the request
+        requests.exceptions.RequestException: On a malformed request or URL
+        GrobidDeadlineExceeded: If retries or the time budget run out
     """
-    url = f"{grobid_server}/api/processFulltextDocument"
+    if client is None:
+        client = get_grobid_client(grobid_server)
+    if retry_policy is None:
+        retry_policy = DEFAULT_RETRY_POLICY
+    service = HEADER_SERVICE if header_only else FULLTEXT_SERVICE
+    
+    # Streams and other non-path sources are pinned to one zero-copy buffer so
+    # hashing, retries and hedged requests all reuse it
+    pdf = pdf_path if is_path(pdf_path) else as_buffer(pdf_path)
     
+    if cache is None:
+        return _fetch_tei(client, pdf, max_retries, retry_policy, service)
+    
+    digest = TeiCache.digest(pdf)
+    tei_xml = cache.get(pdf, client.grobid_server, service, digest=digest)
+    if tei_xml is None and header_only:
+        # Full-text TEI carries the same header, so reuse it if we have it
+        tei_xml = cache.get(pdf, client.grobid_server, FULLTEXT_SERVICE, digest=digest)
+    if tei_xml is not None:
+        return tei_xml
+    
+    tei_xml = _fetch_tei(client, pdf, max_retries, retry_policy, service)
+    cache.put(pdf, client.grobid_server, tei_xml, service, digest=digest)
+    return tei_xml
+
+
+def fetch_body_text(pdf_path: PdfSource, grobid_server: str,
+                    body_text_limit: Optional[int] = BODY_TEXT_LIMIT, **kwargs) -> Optional[str]:
+    """
+    Run the full-text GROBID pass on demand and return the body text.
+
+    Pairs with ``parse_pdf_with_grobid(..., header_only=True)``: callers that
+    need ``body_text`` pay for full-text segmentation only when they ask.
+    At most `body_text_limit` characters are returned (None for all).
+    Other keyword arguments are passed through to ``parse_pdf_with_grobid``.
+    """
+    tei_xml = parse_pdf_with_grobid(pdf_path, grobid_server, **kwargs)
+    tei_doc = TeiDocument(tei_xml, body_text_limit=body_text_limit)
+    if tei_doc.parse_error is not None:
+        print(f"⚠️ XML Parse Error: {tei_doc.parse_error}")
+        return None
+    return tei_doc.body_text
+
+
+def stream_pdf_with_grobid(
+    pdf_path: PdfSource,
+    grobid_server: str,
+    max_retries: int = 3,
+    client: Optional[GrobidClient] = None,
+    cache: Optional[TeiCache] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    header_only: bool = False,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    body_text_limit: Optional[int] = BODY_TEXT_LIMIT
+) -> TeiStream:
+    """
+    Like ``parse_pdf_with_grobid``, but parse the TEI while it downloads.
+
+    The response body is read a chunk at a time into an incremental XML
+    parser, so parsing overlaps the transfer and ``header()`` of the
+    returned stream is available before the references have arrived. A
+    caller that only needs the header can close the stream right after
+    and the rest of the response is never downloaded:
+
+        with stream_pdf_with_grobid(pdf, server) as tei_stream:
+            metadata = extract_metadata_from_tei(tei_stream.header())
+
+    Retries cover the request up to the response headers; a connection
+    lost while the body streams is raised by the stream. The TEI is
+    cached only once it has been read to the end.
+
+    Args:
+        Same as ``parse_pdf_with_grobid``, plus:
+        chunk_size: Bytes read and parsed at a time
+        body_text_limit: Body text characters in the documents returned
+
+    Returns:
+        A ``TeiStream``; close it (or use it as a context manager)
+
+    Raises:
+        requests.exceptions.HTTPError: If GROBID rejects the request
+        requests.exceptions.RequestException: On a malformed request or URL
+        GrobidDeadlineExceeded: If retries or the time budget run out
+    """
+    if client is None:
+        client = get_grobid_client(grobid_server)
+    if retry_policy is None:
+        retry_policy = DEFAULT_RETRY_POLICY
+    service = HEADER_SERVICE if header_only else FULLTEXT_SERVICE
+    pdf = pdf_path if is_path(pdf_path) else as_buffer(pdf_path)
+
+    on_complete = None
+    if cache is not None:
+        digest = TeiCache.digest(pdf)
+        tei_xml = cache.get(pdf, client.grobid_server, service, digest=digest)
+        if tei_xml is None and header_only:
+            tei_xml = cache.get(pdf, client.grobid_server, FULLTEXT_SERVICE, digest=digest)
+        if tei_xml is not None:
+            return TeiStream.from_text(tei_xml, chunk_size, body_text_limit=body_text_limit)
+        on_complete = lambda text: cache.put(pdf, client.grobid_server, text, service, digest=digest)
+
+    response = _post_with_retries(client, pdf, max_retries, retry_policy, service, stream=True)
+    return TeiStream.from_response(response, chunk_size, on_complete=on_complete,
+                                   body_text_limit=body_text_limit)
+
+
+def _fetch_tei(client: GrobidClient, pdf: PdfSource, max_retries: int,
+               retry_policy: RetryPolicy, service: str = FULLTEXT_SERVICE) -> str:
+    """
+    POST a PDF to a GROBID service, retrying timeouts and overload
+    responses with jittered backoff until attempts or the deadline run out.
+    """
+    return _post_with_retries(client, pdf, max_retries, retry_policy, service).text
+
+
+def _post_with_retries(client: GrobidClient, pdf: PdfSource, max_retries: int,
+                       retry_policy: RetryPolicy, service: str = FULLTEXT_SERVICE,
+                       stream: bool = False) -> requests.Response:
+    """
+    The retry loop behind ``_fetch_tei``. With ``stream`` the successful
+    response is returned as soon as its headers are in, body unread.
+    """
+    deadline = retry_policy.start()
+    size = pdf_size(pdf)
+    last_error = None
+    attempt = 0
+
     for attempt in range(max_retries):
+        timeout = retry_policy.timeout_for(size, attempt, deadline, service)
         try:
-            with open(pdf_path, 'rb') as pdf_file:
-                files = {'input': pdf_file}
-                
-
-                timeout = 120 if attempt == 0 else 60
-                
-                response = requests.post(
-                    url, 
-                    files=files,
-                    timeout=timeout
-                )
-                response.raise_for_status()
-                
-                return response.text
+            start = time.monotonic()
+            response = client.post(
+                service,
+                pdf=pdf,
+                timeout=timeout,
+                deadline=deadline,
+                stream=stream
+            )
+            response.raise_for_status()
+            retry_policy.record_latency(time.monotonic() - start, size, service)
+            
+            return response
         
-        except requests.exceptions.Timeout:
-            if attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 30  # 30s, 60s
-                print(f"Timeout on attempt {attempt + 1}. Retrying in {wait_time}s...")
-                time.sleep(wait_time)
-            else:
-                raise Exception(
-                    f"Request timed out after {max_retries} attempts. "
-                    "The GROBID service may be sleeping or overloaded. "
-                    "Please wait a minute and try again."
-                )
+        except requests.exceptions.Timeout as e:
+            last_error = e
+            print(f"Timeout after {timeout:.0f}s on attempt {attempt + 1}.")
         
         except requests.exceptions.HTTPError as e:
-
-            if e.response.status_code == 503 and attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 20  # 20s, 40s
-                print(f"Service unavailable (503). Waiting {wait_time}s for service to wake up...")
-                time.sleep(wait_time)
-            else:
+            if e.response.status_code not in RetryPolicy.RETRYABLE_STATUS:
                 raise
+            if stream:
+                e.response.close()
+            last_error = e
+            print(f"GROBID returned {e.response.status_code} on attempt {attempt + 1}.")
         
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"Failed to connect to GROBID server: {str(e)}")
+        except requests.exceptions.ConnectionError as e:
+            # Refused or reset while the server (re)starts: retried like a timeout
+            last_error = e
+            print(f"Could not connect to GROBID on attempt {attempt + 1}: {e}")
+        
+        if attempt == max_retries - 1:
+            break
+        wait_time = max(retry_policy.backoff(attempt), _retry_after(last_error, retry_policy.max_delay))
+        if deadline.remaining() - wait_time < retry_policy.min_timeout:
+            # A retry could not finish before the deadline: fail now, not later
+            break
+        print(f"Retrying in {wait_time:.1f}s ({deadline.remaining():.0f}s of budget left)...")
+        time.sleep(wait_time)
+
+    raise GrobidDeadlineExceeded(
+        f"GROBID did not respond after {attempt + 1} attempt(s) in {deadline.elapsed():.0f}s. "
+        "The GROBID service may be sleeping or overloaded. "
+        "Please wait a minute and try again.",
+        attempts=attempt + 1,
+        elapsed=deadline.elapsed(),
+        last_error=last_error
+    )
+
+
+def _retry_after(error: Optional[Exception], max_delay: float) -> float:
+    """Seconds requested by a ``Retry-After`` header on an HTTP error, if any."""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('Retry-After', '') if response is not None else ''
+    return min(float(value), max_delay) if value.isdigit() else 0.0
+
+
+async def parse_many(
+    pdfs: Iterable[PdfSource],
+    grobid_server: str,
+    concurrency: int = 4,
+    max_retries: int = 3,
+    client: Optional[GrobidClient] = None,
+    cache: Optional[TeiCache] = None,
+    retry_policy: Optional[RetryPolicy] = None,
+    header_only: bool = False
+) -> AsyncIterator[Tuple[PdfSource, Optional[str], Optional[Exception]]]:
+    """
+    Parse many PDFs with GROBID, keeping up to ``concurrency`` requests in flight.
 
+    Each PDF goes through ``parse_pdf_with_grobid`` on a worker thread that
+    shares the pooled client, and results are yielded in completion order.
+    A failing paper yields its exception instead of aborting the batch.
 
-def extract_text_from_element(element) -> str:
-    """Helper to extract all text from an XML element, handling nested tags"""
-    if element is None:
-        return ""
-    return ''.join(element.itertext()).strip()
+    Args:
+        pdfs: PDF paths, byte buffers and/or binary file-like objects
+        grobid_server: GROBID server URL
+        concurrency: Maximum number of requests in flight at once
+        max_retries: Retry attempts per PDF (see ``parse_pdf_with_grobid``)
+        client: Client to send requests with (defaults to the shared
+            pooled client for ``grobid_server``)
+        cache: Optional TEI cache shared by every PDF in the batch
+        retry_policy: Retry settings applied to each PDF
+        header_only: Use ``processHeaderDocument`` instead of full text
+
+    Yields:
+        ``(pdf, tei_xml, error)`` tuples where ``pdf`` is the input item and
+        exactly one of ``tei_xml`` / ``error`` is set
+
+    Example:
+        async for pdf, tei_xml, error in parse_many(paths, server, concurrency=8):
+            ...
+    """
+    if client is None:
+        client = get_grobid_client(grobid_server, pool_size=concurrency)
+
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='grobid')
+    pending_pdfs = iter(pdfs)
+    in_flight = {}
+
+    def submit_next() -> bool:
+        # Pull lazily so only `concurrency` PDFs are ever held in memory
+        for pdf in pending_pdfs:
+            future = loop.run_in_executor(
+                executor, parse_pdf_with_grobid, pdf, grobid_server, max_retries, client, cache,
+                retry_policy, header_only
+            )
+            in_flight[future] = pdf
+            return True
+        return False
+
+    try:
+        while len(in_flight) < concurrency and submit_next():
+            pass
+
+        while in_flight:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                pdf = in_flight.pop(future)
+                submit_next()
+                error = future.exception()
+                yield pdf, (None if error else future.result()), error
+    finally:
+        executor.shutdown(wait=False)
 
 
 def extract_title_from_tei(root, ns: dict) -> Optional[str]:
@@ -122,22 +515,32 @@ def extract_title_from_tei(root, ns: dict) -> Optional[str]:
     return None
 
 
-def extract_metadata_from_tei(tei_xml: str, debug: bool = False) -> Dict:
+def extract_metadata_from_tei(tei_xml: Union[str, TeiDocument], debug: bool = False,
+                              header_only: bool = False,
+                              body_text_limit: Optional[int] = BODY_TEXT_LIMIT) -> Dict:
     """
     Extract metadata from TEI XML returned by GROBID.
-    
+
+    Parsed with lxml when it is installed (see ``tei_backend``), otherwise
+    with ElementTree.
+
     Args:
-        tei_xml: TEI XML string from GROBID
+        tei_xml: TEI XML string from GROBID, or a ``TeiDocument`` to reuse
+            its parsed tree and memoized fields (header_only and
+            body_text_limit are then the document's own)
         debug: If True, print debug information
-    
+        header_only: Stream-parse only up to </teiHeader> and extract from
+            the header alone: much cheaper on full-text TEI, but body_text
+            stays None and affiliations in the reference list are ignored
+        body_text_limit: Characters of body text to extract, None for all
+            of it; the body is only read as far as the limit
+
     Returns:
         Dictionary containing extracted metadata
     """
-    # Parse XML
-    try:
-        root = ET.fromstring(tei_xml)
-    except ET.ParseError as e:
-        print(f"⚠️ XML Parse Error: {e}")
+    tei_doc = as_tei_document(tei_xml, header_only=header_only, body_text_limit=body_text_limit)
+    if tei_doc.parse_error is not None:
+        print(f"⚠️ XML Parse Error: {tei_doc.parse_error}")
         return {
             'title': None,
             'authors': [],
@@ -147,8 +550,23 @@ def extract_metadata_from_tei(tei_xml: str, debug: bool = False) -> Dict:
             'body_text': None,
             'emails': []
         }
-    
+    return tei_doc.metadata(debug=debug)
+
+
+def extract_metadata_multi_pass(root, debug: bool = False) -> Dict:
+    """
+    Original extractor: one tree search per field and per fallback.
 
+    Kept as the reference ``extract_metadata_single_pass`` must match
+    field-for-field (see benchmarks/tei_extraction_benchmark.py).
+    
+    Args:
+        root: Root element of the parsed TEI
+        debug: If True, print debug information
+    
+    Returns:
+        Dictionary containing extracted metadata
+    """
     ns = {'tei': 'http://www.tei-c.org/ns/1.0'}
     
     metadata = {
@@ -0,0 +1,327 @@
+"""
+Load-balanced pool of GROBID endpoints with health scoring, circuit
+breaking and request hedging
+"""
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Union
+
+import requests
+
+from ..utils.pdf_source import PdfSource, as_buffer, is_path
+from .grobid_client import DEFAULT_POOL_SIZE, GrobidClient, get_grobid_client
+from .retry_policy import Deadline
+
+
+class NoHealthyEndpointError(requests.exceptions.ConnectionError):
+    """Raised when every endpoint in the pool has a tripped circuit breaker."""
+
+
+class GrobidEndpoint:
+    """
+    Observed health of one GROBID server.
+
+    Tracks a latency EWMA plus, per GROBID service, a window of recent
+    latencies (for p95: header parsing is far faster than full text) and
+    outcomes (for the error rate). After ``failure_threshold`` consecutive
+    failures the circuit opens and the endpoint is skipped until
+    ``reset_timeout`` has passed; then a single probe request is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, client: GrobidClient, failure_threshold: int = 3,
+                 reset_timeout: float = 30.0, window: int = 50):
+        self.client = client
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+        self.outcomes = deque(maxlen=20)
+        self.ewma_latency: Optional[float] = None
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+
+    @property
+    def server(self) -> str:
+        return self.client.grobid_server
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def p95(self, service: str = '') -> Optional[float]:
+        """95th percentile of recent successful latencies of one service."""
+        latencies = self.latencies.get(service, ())
+        if len(latencies) < 5:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def score(self) -> float:
+        """Lower is better: expected latency inflated by errors and queueing."""
+        # Untried endpoints score 0 so new replicas get traffic straight away
+        latency = self.ewma_latency or 0.0
+        return latency * (1 + 4 * self.error_rate) * (1 + self.in_flight)
+
+    def available(self, now: float) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            return True
+        # Half-open: only the single probe already in flight may run
+        return self.state == self.HALF_OPEN and self.in_flight == 0
+
+    def record_success(self, latency: float, service: str = ''):
+        self.latencies[service].append(latency)
+        self.outcomes.append(True)
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = 0.8 * self.ewma_latency + 0.2 * latency
+        self.consecutive_failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self, now: float):
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                print(f"⚠️ Circuit opened for GROBID endpoint {self.server}")
+            self.state = self.OPEN
+            self.opened_at = now
+
+    def snapshot(self) -> Dict:
+        snapshot = {
+            'server': self.server,
+            'state': self.state,
+            'ewma_latency': self.ewma_latency,
+            'error_rate': self.error_rate,
+            'in_flight': self.in_flight,
+        }
+        for service in sorted(self.latencies):
+            snapshot[f'p95_latency ({service})'] = self.p95(service)
+        return snapshot
+
+
+class GrobidPool:
+    """
+    Routes GROBID requests across several servers.
+
+    Exposes the same ``post()`` as ``GrobidClient``, so it can be passed as
+    ``client=`` to ``parse_pdf_with_grobid`` / ``parse_many``. Each request
+    goes to the healthiest endpoint by observed latency and error rate,
+    fails over to the next one on connection errors and 5xx responses, and
+    is hedged to a second endpoint when it runs longer than the recent p95.
+    """
+
+    def __init__(self, servers: List[str], pool_size: int = DEFAULT_POOL_SIZE,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 hedge: bool = True, min_hedge_delay: float = 1.0):
+        if not servers:
+            raise ValueError("GrobidPool needs at least one GROBID server")
+        self.endpoints = [
+            GrobidEndpoint(get_grobid_client(server, pool_size), failure_threshold, reset_timeout)
+            for server in servers
+        ]
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2 * pool_size, thread_name_prefix='grobid-hedge')
+
+    @property
+    def grobid_server(self) -> str:
+        # Identifies the pool as a whole (e.g. in TEI cache keys)
+        return ','.join(sorted(endpoint.server for endpoint in self.endpoints))
+
+    def health(self) -> List[Dict]:
+        """Current health snapshot of every endpoint."""
+        with self._lock:
+            return [endpoint.snapshot() for endpoint in self.endpoints]
+
+    def _acquire(self, exclude=()) -> Optional[GrobidEndpoint]:
+        """Pick the best-scoring available endpoint and mark it busy."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e not in exclude and e.available(now)]
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=lambda e: e.score())
+            endpoint.in_flight += 1
+            return endpoint
+
+    def _send(self, endpoint: GrobidEndpoint, service: str, timeout: float,
+              kwargs: dict, deadline: Optional[Deadline] = None) -> requests.Response:
+        """Send one request to `endpoint` and record how it went."""
+        start = time.monotonic()
+        try:
+            response = endpoint.client.post(service, timeout=timeout, deadline=deadline, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                endpoint.in_flight -= 1
+                endpoint.record_failure(time.monotonic())
+            raise
+
+        with self._lock:
+            endpoint.in_flight -= 1
+            if response.status_code >= 500:
+                endpoint.record_failure(time.monotonic())
+            else:
+                endpoint.record_success(time.monotonic() - start, service)
+        return response
+
+    def post(self, service: str, files: Optional[dict] = None, timeout: float = 60,
+             pdf: Optional[PdfSource] = None, deadline: Optional[Deadline] = None,
+             **kwargs) -> requests.Response:
+        """
+        POST to a GROBID service on the healthiest endpoint.
+
+        Returns the first successful (non-5xx) response. When every endpoint
+        fails, the last failure is returned or raised so the caller's retry
+        handling still sees the usual timeout / HTTP errors.
+
+        `timeout` applies to each endpoint tried. With a `deadline`, every
+        send (failover or hedge) only gets what is left of it, and no
+        further endpoint is tried once it has run out.
+
+        Raises:
+            NoHealthyEndpointError: If all circuit breakers are open
+        """
+        # Hedged or failed-over requests re-send the upload, so pin it to a
+        # buffer every send can read independently (paths are reopened)
+        if files is not None:
+            kwargs['files'] = _buffer_files(files)
+        if pdf is not None:
+            kwargs['pdf'] = pdf if is_path(pdf) else as_buffer(pdf)
+        tried = []
+        last_response = None
+        last_error = None
+
+        while True:
+            if tried and deadline is not None and deadline.remaining() <= 0:
+                print("GROBID time budget spent; not trying further endpoints")
+                break
+            endpoint = self._acquire(exclude=tried)
+            if endpoint is None:
+                break
+            tried.append(endpoint)
+
+            try:
+                response = self._post_hedged(endpoint, service, timeout, kwargs, tried, deadline)
+            except requests.exceptions.RequestException as e:
+                last_error = e
+                print(f"GROBID endpoint {endpoint.server} failed ({e}); trying next endpoint")
+                continue
+
+            if response.status_code < 500:
+                return response
+            if last_response is not None:
+                # Frees its connection even if the body was not read (stream=True)
+                last_response.close()
+            last_response = response
+            print(f"GROBID endpoint {endpoint.server} returned {response.status_code}; trying next endpoint")
+
+        if last_response is not None:
+            return last_response
+        if last_error is not None:
+            raise last_error
+        raise NoHealthyEndpointError(
+            "All GROBID endpoints are temporarily disabled after repeated failures"
+        )
+
+    def _post_hedged(self, primary: GrobidEndpoint, service: str, timeout: float,
+                     kwargs: dict, tried: list, deadline: Optional[Deadline] = None) -> requests.Response:
+        """
+        Send to `primary`; if it is still running after its recent p95 for
+        this service, send the same request to a second endpoint and keep
+        whichever succeeds first. Any backup endpoint used is appended to `tried`.
+        """
+        delay = primary.p95(service) if self.hedge else None
+        if delay is None:
+            return self._send(primary, service, timeout, kwargs, deadline)
+
+        futures = {self._executor.submit(self._send, primary, service, timeout, kwargs, deadline): primary}
+        done, _ = wait(futures, timeout=max(delay, self.min_hedge_delay))
+        if not done and (deadline is None or deadline.remaining() > 0):
+            backup = self._acquire(exclude=tried)
+            if backup is not None:
+                tried.append(backup)
+                print(f"GROBID request to {primary.server} exceeded p95 ({delay:.1f}s); hedging to {backup.server}")
+                futures[self._executor.submit(self._send, backup, service, timeout, kwargs, deadline)] = backup
+
+        pending = set(futures)
+        error = None
+        response = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except requests.exceptions.RequestException as e:
+                    error = e
+                    continue
+                if result.status_code < 500:
+                    # The slower request keeps running and still feeds health stats
+                    for other in futures:
+                        if other is not future:
+                            other.add_done_callback(_close_response)
+                    return result
+                response = result
+
+        if response is not None:
+            return response
+        raise error
+
+
+def _close_response(future):
+    """Release the connection of a hedged request whose response lost the race."""
+    try:
+        future.result().close()
+    except Exception:
+        pass
+
+
+def _buffer_files(files: dict) -> dict:
+    """Replace open file objects in a multipart mapping with their bytes."""
+    buffered = {}
+    for name, value in files.items():
+        if hasattr(value, 'read'):
+            value = (os.path.basename(getattr(value, 'name', name)), value.read())
+        buffered[name] = value
+    return buffered
+
+
+_pools: Dict[str, GrobidPool] = {}
+_pools_lock = threading.Lock()
+
+
+def parse_server_list(servers: Union[str, List[str]]) -> List[str]:
+    """Split a comma-separated server setting into a list of URLs."""
+    if isinstance(servers, str):
+        servers = servers.split(',')
+    return [server.strip().rstrip('/') for server in servers if server.strip()]
+
+
+def get_grobid_pool(servers: Union[str, List[str]], pool_size: Optional[int] = None) -> GrobidPool:
+    """
+    Return the process-wide pool for a set of GROBID servers, given as a
+    list or a comma-separated string (as in config.ini / the settings box).
+    """
+    server_list = parse_server_list(servers)
+    key = ','.join(sorted(server_list))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = GrobidPool(server_list, pool_size or DEFAULT_POOL_SIZE)
+            _pools[key] = pool
+    return pool
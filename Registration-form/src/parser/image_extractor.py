@@ -1,24 +1,254 @@
 
+import math
+import os
 import re
-import requests
-from PIL import Image
-import io
-import pytesseract
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
 from typing import Dict, Optional, List
 
+from .easyocr_pool import get_easyocr_pool
+from .grobid_pool import get_grobid_pool
+from .tesseract_pool import get_tesseract_pool
+
+
+# Receipts are decoded at 1/n of their size, the smallest n that keeps
+# them within this many pixels (a 12 MP photo: half size, 3 MP)
+RECEIPT_DECODE_PIXELS = int(os.environ.get("RECEIPT_DECODE_PIXELS", "4000000"))
+# Larger images are refused before any pixel is decoded
+RECEIPT_MAX_PIXELS = int(os.environ.get("RECEIPT_MAX_PIXELS", "50000000"))
+# Modes Image.reduce() handles and that convert to both 'RGB' and 'L'
+_REDUCIBLE_MODES = ('L', 'LA', 'RGB', 'RGBA', 'CMYK')
+
+# Median glyph height (pixels) receipts are scaled to before Tesseract,
+# which reads best at roughly 20-40 px text
+OCR_TEXT_HEIGHT = int(os.environ.get("OCR_TEXT_HEIGHT", "30"))
+# Small print is enlarged at most this much
+_MAX_UPSCALE = 2.0
+# Text height and skew are measured on a copy no larger than this
+_MEASURE_MAX_SIDE = 1200
+# Skew angles searched, in degrees; larger tilts are left to Tesseract
+_MAX_SKEW = 10.0
+_MIN_SKEW = 0.3
+# Ink pixels sampled for the skew search
+_SKEW_SAMPLES = 40000
+
+# A preprocessed receipt reading fewer characters than this (whitespace
+# aside) is read again as uploaded
+_MIN_RECEIPT_CHARS = 20
+
+
+# Receipt loading
+def open_receipt(image_file, mode: str = 'RGB', max_pixels: int = RECEIPT_DECODE_PIXELS) -> Image.Image:
+    """
+    Decode a receipt image within a pixel budget, upright per its EXIF
+    orientation.
+
+    The size is read from the header first: images over RECEIPT_MAX_PIXELS
+    are refused without decoding. Images over `max_pixels` are decoded at
+    1/n size, the smallest n that fits. JPEGs are decoded at that size
+    directly (draft mode, in `mode`). Other formats, PNG included, can only
+    be decoded whole, so they are box-reduced at once and the full-size
+    copy is dropped.
+
+    Args:
+        image_file: A path, binary file-like object or PIL image.
+        mode: PIL mode of the result ('RGB' or 'L').
+        max_pixels: Most pixels to decode (0: no limit).
+
+    Returns:
+        The decoded image, in `mode`.
+
+    Raises:
+        PIL.Image.DecompressionBombError: If the image is larger than
+            RECEIPT_MAX_PIXELS.
+    """
+    image = image_file if isinstance(image_file, Image.Image) else Image.open(image_file)
+    width, height = image.size
+    if width * height > RECEIPT_MAX_PIXELS:
+        raise Image.DecompressionBombError(
+            f"Receipt image is {width}x{height} ({width * height} pixels), "
+            f"over the {RECEIPT_MAX_PIXELS} pixel limit"
+        )
+
+    reduce = math.ceil(math.sqrt(width * height / max_pixels)) if max_pixels else 1
+    if reduce > 1:
+        # No-op for anything but a JPEG that has not been loaded yet
+        image.draft(mode, (width // reduce, height // reduce))
+        reduce = math.ceil(math.sqrt(image.size[0] * image.size[1] / max_pixels))
+    sixteen_bit = image.mode.startswith('I;16')
+    if image.mode == 'P':
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    elif sixteen_bit:
+        # Reduced as 32-bit and scaled to 8 bits below: convert() alone
+        # would clip every level over 255 to white
+        image = image.convert('I')
+    elif image.mode not in _REDUCIBLE_MODES:
+        # Bilevel scans ('1') and rarer modes reduce() refuses
+        image = image.convert(mode)
+    if reduce > 1:
+        image = image.reduce(reduce)
+    if sixteen_bit:
+        image = image.point(lambda value: value / 256).convert('L')
+
+    # Phone photos are stored sideways with an orientation tag (checked
+    # first: exif_transpose copies the image even when there is none)
+    if image.getexif().get(0x0112, 1) != 1:
+        image = ImageOps.exif_transpose(image)
+    if image.mode != mode:
+        image = image.convert(mode)
+    # Decode now, while the upload is still open and positioned
+    image.load()
+    return image
+
+
+# Receipt preprocessing
+def load_receipt_gray(image_file) -> np.ndarray:
+    """
+    Decode a receipt as a grayscale array (see ``open_receipt``).
+
+    Args:
+        image_file: A path, binary file-like object, PIL image or numpy
+            array (BGR or grayscale, as from cv2.imread).
+    """
+    if isinstance(image_file, np.ndarray):
+        if image_file.ndim == 2:
+            return image_file
+        code = cv2.COLOR_BGRA2GRAY if image_file.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(image_file, code)
+
+    return np.asarray(open_receipt(image_file, 'L'))
+
+
+def _measure_copy(gray: np.ndarray):
+    """A copy of `gray` no larger than _MEASURE_MAX_SIDE, and its scale."""
+    # Whole-number steps: OpenCV's fast path for area averaging
+    step = -(-max(gray.shape) // _MEASURE_MAX_SIDE)
+    if step == 1:
+        return gray, 1.0
+    size = (gray.shape[1] // step, gray.shape[0] // step)
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA), size[0] / gray.shape[1]
+
+
+def estimate_text_height(gray: np.ndarray) -> Optional[float]:
+    """
+    Median height in pixels of the glyphs in a grayscale receipt, or None
+    if too few glyph-like shapes are found.
+    """
+    small, factor = _measure_copy(gray)
+    _, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    # Glyphs: neither specks nor bars, logos or whole panels
+    glyphs = heights[(heights >= 4) & (heights <= small.shape[0] // 20) & (widths <= heights * 3)]
+    if len(glyphs) < 10:
+        return None
+    return float(np.median(glyphs)) / factor
+
+
+def estimate_skew(binary: np.ndarray) -> float:
+    """
+    Tilt of the text lines of a binarized receipt, in degrees
+    counter-clockwise: the angle within ±_MAX_SKEW whose row projection of
+    the ink is sharpest.
+    """
+    small, _ = _measure_copy(binary)
+    ys, xs = np.nonzero(small == 0)
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > _SKEW_SAMPLES:
+        step = len(ys) // _SKEW_SAMPLES
+        ys, xs = ys[::step], xs[::step]
+    ys = ys.astype(np.float32)
+    xs = xs.astype(np.float32) - small.shape[1] / 2
+    bins = int(np.hypot(*small.shape)) + 2
+
+    def sharpest(angles: np.ndarray) -> float:
+        # Row of every ink pixel after rotating by each angle at once; the
+        # sum of squared row counts peaks when lines fall into single rows
+        radians = np.deg2rad(angles)[:, None]
+        rows = (ys * np.cos(radians) + xs * np.sin(radians)).astype(np.int64)
+        rows -= rows.min(axis=1, keepdims=True)
+        offsets = (np.arange(len(angles)) * bins)[:, None]
+        counts = np.bincount((rows + offsets).ravel(), minlength=len(angles) * bins)
+        scores = (counts.reshape(len(angles), bins).astype(np.float64) ** 2).sum(axis=1)
+        return float(angles[int(np.argmax(scores))])
+
+    coarse = sharpest(np.arange(-_MAX_SKEW, _MAX_SKEW + 0.5, 0.5))
+    return sharpest(np.arange(coarse - 0.5, coarse + 0.55, 0.1))
+
+
+def preprocess_receipt(image_file) -> np.ndarray:
+    """
+    Prepare a receipt for Tesseract: upright (EXIF), grayscale, dark text
+    on light (dark-mode screenshots are inverted), scaled so its text is
+    about OCR_TEXT_HEIGHT pixels tall, binarized with an adaptive
+    threshold, deskewed and cropped to the ink plus a margin.
+
+    A 12-megapixel screenshot typically shrinks to a few hundred thousand
+    pixels, which is what Tesseract's time per receipt scales with.
+
+    Args:
+        image_file: Anything ``load_receipt_gray`` accepts.
+
+    Returns:
+        A uint8 array, black (0) text on white (255).
+    """
+    gray = load_receipt_gray(image_file)
+    # The threshold below and the glyph measurements take text to be darker
+    # than its background: on a dark-mode screenshot the strokes would come
+    # out white like the page, with only their outlines left
+    if np.median(gray) < 128:
+        gray = cv2.bitwise_not(gray)
+
+    text_height = estimate_text_height(gray)
+    if text_height:
+        scale = min(OCR_TEXT_HEIGHT / text_height, _MAX_UPSCALE)
+        if abs(scale - 1) > 0.1:
+            interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=interpolation)
+
+    # Local threshold: handles coloured panels, gradients and shadows that a
+    # single global threshold turns into solid blocks
+    block = 2 * OCR_TEXT_HEIGHT + 1
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 15)
+
+    angle = estimate_skew(binary)
+    if abs(angle) >= _MIN_SKEW:
+        height, width = binary.shape
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1.0)
+        binary = cv2.warpAffine(binary, matrix, (width, height), flags=cv2.INTER_LINEAR, borderValue=255)
+        _, binary = cv2.threshold(binary, 127, 255, cv2.THRESH_BINARY)
+
+    ink = binary == 0
+    rows = np.flatnonzero(ink.any(axis=1))
+    cols = np.flatnonzero(ink.any(axis=0))
+    if len(rows) == 0:
+        return binary
+    margin = OCR_TEXT_HEIGHT
+    return binary[max(0, rows[0] - margin):rows[-1] + margin + 1,
+                  max(0, cols[0] - margin):cols[-1] + margin + 1]
 
 
 # OCR utilities
-def extract_text_from_image_tesseract(image_file) -> str:
+def extract_text_from_image_tesseract(image_file, preprocess: bool = True) -> str:
+    """
+    OCR with the process-wide pool of warm Tesseract engines.
 
+    Args:
+        image_file: A path, binary file-like object or PIL image.
+        preprocess: Read the output of ``preprocess_receipt`` rather than
+            the image as uploaded.
+    """
     try:
-        image = Image.open(image_file)
+        if preprocess:
+            return get_tesseract_pool().image_to_string(Image.fromarray(preprocess_receipt(image_file)))
 
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-
-        return pytesseract.image_to_string(image)
+        return get_tesseract_pool().image_to_string(open_receipt(image_file))
 
+    except Image.DecompressionBombError:
+        raise
     except Exception as e:
         print(f"Tesseract extraction error: {str(e)}")
         return ""
@@ -27,11 +257,12 @@ def extract_text_from_image_tesseract(image_file) -> str:
 def extract_text_from_image_grobid(image_path: str, grobid_server: str) -> str:
 
     try:
-        url = f"{grobid_server}/api/processFulltextDocument"
+        # The setting may list several comma-separated servers
+        client = get_grobid_pool(grobid_server)
 
         with open(image_path, 'rb') as f:
             files = {'input': f}
-            response = requests.post(url, files=files, timeout=60)
+            response = client.post('processFulltextDocument', files=files, timeout=60)
 
         if response.status_code != 200:
             return ""
@@ -52,20 +283,22 @@ def extract_text_from_image_grobid(image_path: str, grobid_server: str) -> str:
 
 
 def extract_text_from_image_easyocr(image_file) -> str:
+    """
+    OCR with the process-wide pool of warm EasyOCR readers.
 
+    Args:
+        image_file: A path, binary file-like object, PIL image or numpy
+            array (BGR, as from cv2.imread); arrays skip any re-encoding.
+    """
     try:
-        import easyocr
-
-        reader = easyocr.Reader(['en'])
-        image = Image.open(image_file)
-
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format="PNG")
-
-        results = reader.readtext(img_byte_arr.getvalue())
+        if not isinstance(image_file, np.ndarray):
+            image_file = open_receipt(image_file)
+        results = get_easyocr_pool().readtext(image_file)
 
         return " ".join([r[1] for r in results])
 
+    except Image.DecompressionBombError:
+        raise
     except Exception as e:
         print(f"EasyOCR extraction error: {str(e)}")
         return ""
@@ -423,6 +656,8 @@ def extract_payment_info_from_image(
     if use_easyocr:
         try:
             text = extract_text_from_image_easyocr(image_file)
+        except Image.DecompressionBombError:
+            raise
         except:
             pass
 
@@ -430,6 +665,14 @@ def extract_payment_info_from_image(
         if hasattr(image_file, "seek"):
             image_file.seek(0)
         text = extract_text_from_image_tesseract(image_file)
+        if len("".join(text.split())) < _MIN_RECEIPT_CHARS:
+            # Binarization can wipe out very faint print: read the upload as
+            # is, a second OCR pass, only when next to nothing survived
+            if hasattr(image_file, "seek"):
+                image_file.seek(0)
+            raw_text = extract_text_from_image_tesseract(image_file, preprocess=False)
+            if extract_transaction_id(raw_text) or len(raw_text.strip()) > len(text.strip()):
+                text = raw_text
 
     if not text:
         return {
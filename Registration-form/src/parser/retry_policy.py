@@ -0,0 +1,118 @@
+"""
+Deadline-aware retry policy for GROBID requests
+"""
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Optional
+
+
+class GrobidDeadlineExceeded(Exception):
+    """
+    Raised when a GROBID call runs out of its time budget or attempts.
+
+    Attributes:
+        attempts: Number of requests sent before giving up
+        elapsed: Seconds spent on the call
+        last_error: The failure that triggered the last retry, if any
+    """
+
+    def __init__(self, message: str, attempts: int, elapsed: float, last_error: Optional[Exception] = None):
+        super().__init__(message)
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.last_error = last_error
+
+
+class Deadline:
+    """Absolute point in time a call must finish by."""
+
+    def __init__(self, seconds: float):
+        self.started = time.monotonic()
+        self.expires = self.started + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, bounded by a per-call deadline.
+
+    Request timeouts adapt to the PDF size and to the GROBID throughput
+    observed on recent successful calls of the same service (seconds per
+    MB; header parsing is far cheaper than full text), so a fast server
+    is not given minutes to answer and a long paper is not cut off early.
+    A retry that could not finish before the deadline is not attempted:
+    the call fails fast with ``GrobidDeadlineExceeded`` instead.
+    """
+
+    RETRYABLE_STATUS = (429, 502, 503, 504)
+
+    def __init__(
+        self,
+        deadline: float = 120.0,
+        base_delay: float = 2.0,
+        max_delay: float = 20.0,
+        min_timeout: float = 15.0,
+        max_timeout: float = 90.0,
+        cold_seconds_per_mb: float = 30.0,
+        cold_timeout: float = 60.0,
+        window: int = 50
+    ):
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.cold_seconds_per_mb = cold_seconds_per_mb
+        # Timeout floor until a call to the service has succeeded: a sleeping
+        # hosted instance can take a minute to answer its first request
+        self.cold_timeout = cold_timeout
+        self._seconds_per_mb = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def start(self) -> Deadline:
+        """Start the clock for one call."""
+        return Deadline(self.deadline)
+
+    def backoff(self, attempt: int) -> float:
+        """Sleep before retry number ``attempt + 1`` (full jitter)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def record_latency(self, seconds: float, pdf_size: int, service: str = ''):
+        """Feed the latency of a successful call into the timeout model."""
+        with self._lock:
+            self._seconds_per_mb[service].append(seconds / _size_mb(pdf_size))
+
+    def expected_seconds_per_mb(self, service: str = '') -> Optional[float]:
+        """p95 of recently observed GROBID seconds-per-MB for a service, if known."""
+        with self._lock:
+            samples = sorted(self._seconds_per_mb[service])
+        if len(samples) < 3:
+            return None
+        return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+    def timeout_for(self, pdf_size: int, attempt: int, deadline: Deadline, service: str = '') -> float:
+        """
+        Request timeout for one attempt: twice the expected processing time
+        for this PDF (growing by 1.5x per retry), clamped to the configured
+        bounds and to the time left before the deadline. Until the service
+        has answered a few times, at least ``cold_timeout``.
+        """
+        seconds_per_mb = self.expected_seconds_per_mb(service)
+        if seconds_per_mb is None:
+            expected = max(self.cold_timeout, self.cold_seconds_per_mb * _size_mb(pdf_size))
+        else:
+            expected = 2 * seconds_per_mb * _size_mb(pdf_size)
+        timeout = max(self.min_timeout, expected) * (1.5 ** attempt)
+        return min(timeout, self.max_timeout, deadline.remaining())
+
+
+def _size_mb(pdf_size: int) -> float:
+    # Floor at 0.1 MB so tiny PDFs do not produce near-zero timeouts
+    return max(pdf_size / (1024 * 1024), 0.1)
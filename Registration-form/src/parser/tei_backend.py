@@ -0,0 +1,207 @@
+"""
+XML parser backend for GROBID TEI: lxml when installed, else ElementTree
+"""
+import os
+import threading
+from typing import Union
+from xml.etree import ElementTree as ET
+
+try:
+    from lxml import etree as lxml_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    lxml_etree = None
+    LXML_AVAILABLE = False
+
+
+# "auto" (lxml if installed), "lxml" or "etree"
+TEI_PARSER = os.environ.get("TEI_PARSER", "auto").lower()
+
+# Catch these instead of ET.ParseError: either backend may be parsing
+PARSE_ERRORS = (ET.ParseError,) + ((lxml_etree.XMLSyntaxError,) if LXML_AVAILABLE else ())
+
+if TEI_PARSER == 'lxml' and not LXML_AVAILABLE:
+    print("⚠️ TEI_PARSER=lxml but lxml is not installed; using ElementTree")
+DEFAULT_BACKEND = 'lxml' if LXML_AVAILABLE and TEI_PARSER != 'etree' else 'etree'
+
+_local = threading.local()
+
+TEI_HEADER_TAG = '{http://www.tei-c.org/ns/1.0}teiHeader'
+
+# Characters fed to the streaming parser between checks for </teiHeader>
+HEADER_CHUNK_SIZE = 16 * 1024
+
+# Options shared by the document parser and the streaming header parser
+_LXML_PARSER_OPTIONS = dict(
+    remove_comments=True,  # ElementTree drops these too, keep itertext() identical
+    remove_pis=True,
+    resolve_entities=False,
+    no_network=True,
+    huge_tree=True
+)
+
+
+def get_backend() -> str:
+    """The parser backend in use: 'lxml' or 'etree'."""
+    return DEFAULT_BACKEND
+
+
+def _lxml_parser():
+    # lxml parsers must not be shared between threads
+    parser = getattr(_local, 'parser', None)
+    if parser is None:
+        parser = lxml_etree.XMLParser(**_LXML_PARSER_OPTIONS)
+        _local.parser = parser
+    return parser
+
+
+def parse_tei(tei_xml: Union[str, bytes], backend: str = None):
+    """
+    Parse TEI XML with the selected backend and return the root element.
+
+    Both backends' elements support find()/findall()/iter()/itertext() with
+    the same ElementPath syntax; lxml roots additionally allow XPath.
+
+    Raises:
+        One of PARSE_ERRORS if the XML is malformed
+    """
+    backend = backend or get_backend()
+    if backend == 'lxml':
+        # lxml refuses str input that carries an encoding declaration
+        data = tei_xml.encode('utf-8') if isinstance(tei_xml, str) else tei_xml
+        return lxml_etree.fromstring(data, _lxml_parser())
+    return ET.fromstring(tei_xml)
+
+
+class TeiPullParser:
+    """
+    Incremental TEI parser: feed the XML a chunk at a time as it arrives
+    (str or bytes) and the tree is built as far as the data goes.
+
+    ``header`` is set as soon as </teiHeader> has been parsed, so header
+    fields can be read before the rest of the document (body, reference
+    list) has even arrived. ``root`` is set by then too, and by
+    ``close()`` at the latest.
+
+    Args:
+        backend: 'lxml' or 'etree' (defaults to ``get_backend()``)
+        clear_before_header: Clear top-level elements that end before the
+            header, for callers that only keep the header
+    """
+
+    def __init__(self, backend: str = None, clear_before_header: bool = False):
+        backend = backend or get_backend()
+        self._lxml = backend == 'lxml'
+        if self._lxml:
+            # Filtered in C: the only event is the end of the header
+            self._parser = lxml_etree.XMLPullParser(
+                events=('end',), tag=TEI_HEADER_TAG, **_LXML_PARSER_OPTIONS
+            )
+        else:
+            self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self.clear_before_header = clear_before_header
+        self.root = None
+        self.header = None
+        self._depth = 0
+
+    def feed(self, chunk: Union[str, bytes]):
+        """
+        Parse the next chunk.
+
+        Raises:
+            One of PARSE_ERRORS if the XML is malformed; ``header`` stays
+            set if the header was complete before the error
+        """
+        error = None
+        try:
+            self._parser.feed(chunk)
+        except PARSE_ERRORS as e:
+            # lxml raises for the whole chunk; the header may already be complete
+            error = e
+        try:
+            self._read_events()
+        except PARSE_ERRORS as e:
+            # ElementTree raises the error from read_events() instead
+            error = error or e
+        if error is not None:
+            raise error
+
+    def close(self):
+        """
+        Finish parsing after the last chunk and return the root.
+
+        Raises:
+            One of PARSE_ERRORS if the document is incomplete or malformed
+        """
+        root = self._parser.close()
+        self._read_events()
+        if self.root is None:
+            self.root = root
+        return self.root
+
+    def _read_events(self):
+        if self._lxml:
+            for _, elem in self._parser.read_events():
+                if self.header is None:
+                    self.header = elem
+                    self.root = elem.getroottree().getroot()
+                    if self.clear_before_header:
+                        for sibling in elem.itersiblings(preceding=True):
+                            sibling.clear()
+            return
+        if self.header is not None:
+            # Only the header needed tracking; just keep the queue empty
+            for _ in self._parser.read_events():
+                pass
+            return
+        for event, elem in self._parser.read_events():
+            if event == 'start':
+                if self.root is None:
+                    self.root = elem
+                self._depth += 1
+                continue
+            self._depth -= 1
+            if elem.tag == TEI_HEADER_TAG:
+                self.header = elem
+                for _ in self._parser.read_events():
+                    pass
+                return
+            if self._depth == 1 and self.clear_before_header:
+                elem.clear()
+
+
+def parse_tei_header(tei_xml: Union[str, bytes], backend: str = None,
+                     chunk_size: int = HEADER_CHUNK_SIZE):
+    """
+    Stream-parse TEI only as far as the end of its <teiHeader>.
+
+    The XML is fed to a pull parser a chunk at a time and parsing stops as
+    soon as </teiHeader> has been seen, so the body and the reference list
+    are never parsed or built: time and peak memory depend on the header,
+    not on the length of the paper. Top-level elements that end before the
+    header are cleared on the way.
+
+    Returns:
+        The teiHeader element, or None if the document has none (the
+        elements before it have been cleared by then: parse the whole
+        document with ``parse_tei`` instead)
+
+    Raises:
+        One of PARSE_ERRORS if the XML up to the header is malformed
+    """
+    parser = TeiPullParser(backend, clear_before_header=True)
+    for offset in range(0, len(tei_xml), chunk_size):
+        try:
+            parser.feed(tei_xml[offset:offset + chunk_size])
+        except PARSE_ERRORS:
+            if parser.header is None:
+                raise
+        if parser.header is not None:
+            return parser.header
+    # Still raises if the document is malformed or truncated
+    parser.close()
+    return None
+
+
+def is_lxml_element(element) -> bool:
+    return LXML_AVAILABLE and isinstance(element, lxml_etree._Element)
@@ -0,0 +1,73 @@
+"""
+Content-addressed on-disk cache for GROBID TEI responses
+"""
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from ..utils.disk_cache import DiskCache, hash_bytes
+from ..utils.pdf_source import PdfSource, sha256_of
+
+
+DEFAULT_TEI_CACHE_DIR = os.environ.get("TEI_CACHE_DIR", ".cache/tei")
+DEFAULT_TEI_CACHE_MAX_MB = int(os.environ.get("TEI_CACHE_MAX_MB", "256"))
+
+
+class TeiCache:
+    """
+    Caches TEI XML keyed by the SHA-256 of the PDF bytes plus the GROBID
+    endpoint, service and request options.
+
+    Re-uploading the same paper (or clicking "Auto-Fill" again) then costs
+    a hash and a small read instead of another 10-120s GROBID round trip.
+    """
+
+    def __init__(self, directory: str = DEFAULT_TEI_CACHE_DIR, max_mb: int = DEFAULT_TEI_CACHE_MAX_MB):
+        self.store = DiskCache(directory, max_bytes=max_mb * 1024 * 1024)
+
+    @staticmethod
+    def digest(pdf: PdfSource) -> str:
+        """SHA-256 of the PDF content (pass it back as ``digest=`` to skip rehashing)."""
+        return sha256_of(pdf)
+
+    @staticmethod
+    def make_key(pdf_digest: str, grobid_server: str, service: str, options: Optional[Dict] = None) -> str:
+        """Build the cache key for one PDF sent to one GROBID service."""
+        request = json.dumps(
+            [grobid_server.rstrip('/'), service, options or {}],
+            sort_keys=True
+        )
+        return hash_bytes(f"{pdf_digest}|{request}".encode('utf-8'))
+
+    def get(self, pdf: PdfSource, grobid_server: str, service: str = 'processFulltextDocument',
+            options: Optional[Dict] = None, digest: Optional[str] = None) -> Optional[str]:
+        """Return the cached TEI XML for this PDF and request, or None."""
+        key = self.make_key(digest or self.digest(pdf), grobid_server, service, options)
+        data = self.store.get(key)
+        return data.decode('utf-8') if data is not None else None
+
+    def put(self, pdf: PdfSource, grobid_server: str, tei_xml: str, service: str = 'processFulltextDocument',
+            options: Optional[Dict] = None, digest: Optional[str] = None):
+        """Store the TEI XML GROBID returned for this PDF and request."""
+        key = self.make_key(digest or self.digest(pdf), grobid_server, service, options)
+        self.store.put(key, tei_xml.encode('utf-8'))
+
+    def clear(self):
+        self.store.clear()
+
+
+_default_cache: Optional[TeiCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_tei_cache() -> TeiCache:
+    """
+    Return the process-wide TEI cache (configured via TEI_CACHE_DIR and
+    TEI_CACHE_MAX_MB).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TeiCache()
+    return _default_cache
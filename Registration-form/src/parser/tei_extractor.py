@@ -0,0 +1,281 @@
+"""
+Single-pass field lookups over GROBID TEI
+"""
+from typing import Dict, Iterator, List, Optional
+
+from .tei_backend import LXML_AVAILABLE, is_lxml_element, lxml_etree
+
+TEI_NS = 'http://www.tei-c.org/ns/1.0'
+NS = {'tei': TEI_NS}
+
+_T = '{' + TEI_NS + '}'
+
+# Elements the traversal collects; every field is resolved from these
+# buckets with lookups below them, never another whole-document scan.
+# The fallback-only tags are numerous in the reference list
+_PRIMARY = (
+    'titleStmt', 'sourceDesc', 'profileDesc', 'abstract', 'keywords',
+    'affiliation', 'publicationStmt', 'text',
+)
+_FALLBACK = ('title', 'analytic', 'biblStruct')
+_COLLECTED = _PRIMARY + _FALLBACK
+
+# Lookups relative to a collected container. Each is valid both as an
+# ElementPath (ElementTree) and as an XPath (lxml, compiled once below)
+_CONTAINER_PATHS = (
+    'tei:title[@type="main"]',
+    'tei:title',
+    'tei:abstract/tei:div/tei:p',
+    'tei:abstract/tei:p',
+    'tei:p',
+    'tei:term',
+    'tei:date',
+    'tei:body',
+    './/tei:author',
+    './/tei:title[@type="main"]',
+)
+
+if LXML_AVAILABLE:
+    XPATHS = {path: lxml_etree.XPath(path, namespaces=NS) for path in _CONTAINER_PATHS}
+    # String value of an element: all descendant text, concatenated in C
+    _STRING_VALUE = lxml_etree.XPath('string(.)')
+
+
+def extract_text_from_element(element) -> str:
+    """Helper to extract all text from an XML element, handling nested tags"""
+    if element is None:
+        return ""
+    if is_lxml_element(element):
+        return _STRING_VALUE(element).strip()
+    return ''.join(element.itertext()).strip()
+
+
+def extract_bounded_text(element, limit: Optional[int]) -> str:
+    """
+    ``extract_text_from_element(element)[:limit]`` without building the
+    whole text: the text nodes are walked lazily and the walk stops as
+    soon as the first `limit` characters are known. ``None`` means no
+    limit.
+    """
+    if element is None:
+        return ""
+    if limit is None:
+        return extract_text_from_element(element)
+    pieces = []
+    length = 0
+    for piece in element.itertext():
+        if not pieces:
+            piece = piece.lstrip()
+            if not piece:
+                continue
+        pieces.append(piece)
+        length += len(piece)
+        if length >= limit:
+            text = ''.join(pieces)
+            # Trailing whitespace only counts if more text follows it
+            if text[limit - 1:].strip():
+                return text[:limit]
+            pieces = [text]
+    return ''.join(pieces).rstrip()[:limit]
+
+
+def iter_paragraphs(element) -> Iterator[str]:
+    """Yield the text of each non-empty <p> below `element`, in document order."""
+    if element is None:
+        return
+    for paragraph in element.iter(_T + 'p'):
+        text = extract_text_from_element(paragraph)
+        if text:
+            yield text
+
+
+def empty_metadata() -> Dict:
+    return {
+        'title': None,
+        'authors': [],
+        'abstract': None,
+        'keywords': [],
+        'publication_date': None,
+        'body_text': None,
+        'emails': [],
+        'affiliations': []
+    }
+
+
+def classify_elements(root, names=_COLLECTED) -> Dict[str, List]:
+    """
+    Walk the tree once and bucket the elements with the given local tag
+    names, in document order. The root itself is skipped, as it is by
+    ``.//`` paths.
+    """
+    buckets = {_T + name: [] for name in names}
+    bucket_for = buckets.get
+    if is_lxml_element(root):
+        # lxml filters on the wanted tags in C
+        elements = (elem for elem in root.iter(*buckets) if elem is not root)
+    else:
+        elements = root.iter()
+        next(elements, None)
+    for elem in elements:
+        bucket = bucket_for(elem.tag)
+        if bucket is not None:
+            bucket.append(elem)
+    return {tag[len(_T):]: found for tag, found in buckets.items()}
+
+
+def _find_all(container, path: str) -> List:
+    """Matches of one of the _CONTAINER_PATHS below `container`, in document order."""
+    if is_lxml_element(container):
+        return XPATHS[path](container)
+    return container.findall(path, NS)
+
+
+def _first_child(containers: List, path: str):
+    """First match of ``.//<container>/<path>`` given the containers in document order."""
+    for container in containers:
+        found = _find_all(container, path)
+        if found:
+            return found[0]
+    return None
+
+
+def _descendants(containers: List, path: str) -> List:
+    """All matches of ``.//<container>/<path>`` (same order and duplicates as findall)."""
+    return [elem for container in containers for elem in _find_all(container, path)]
+
+
+def author_name(author) -> Optional[str]:
+    """Display name of a TEI <author>: "Forename Surname" or just the surname."""
+    pers_name = author.find('.//tei:persName', NS)
+    scope = pers_name if pers_name is not None else author
+    forename = scope.find('.//tei:forename', NS)
+    surname = scope.find('.//tei:surname', NS)
+
+    if forename is not None and surname is not None:
+        full_name = f"{forename.text} {surname.text}".strip()
+        return full_name or None
+    if surname is not None and surname.text:
+        return surname.text.strip()
+    return None
+
+
+def affiliation_name(affil) -> Optional[str]:
+    """The orgName of a TEI <affiliation>, else its full text if meaningful."""
+    org_name = affil.find('.//tei:orgName', NS)
+    if org_name is not None and org_name.text:
+        return org_name.text.strip()
+    affil_text = extract_text_from_element(affil)
+    if affil_text and len(affil_text) > 3:
+        return affil_text
+    return None
+
+
+def org_names(element, names: Optional[List[str]] = None) -> List[str]:
+    """
+    Every non-empty orgName inside the <affiliation> elements at or below
+    `element` (an <affiliation>, an <author>, ...), in document order and
+    without duplicates. Appends to `names` when given.
+    """
+    names = [] if names is None else names
+    for affil in element.iter(_T + 'affiliation'):
+        for org in affil.iter(_T + 'orgName'):
+            if org.text and org.text.strip():
+                clean_name = org.text.strip()
+                if clean_name not in names:
+                    names.append(clean_name)
+    return names
+
+
+def email_addresses(element) -> List[str]:
+    """Every non-empty <email> at or below `element`, stripped, in document order."""
+    return [email.text.strip() for email in element.iter(_T + 'email') if email.text and email.text.strip()]
+
+
+class _Buckets(dict):
+    """
+    Collected elements by tag name.
+
+    ElementTree pays a Python step per element whatever it collects, so
+    everything is bucketed in the one traversal. lxml filters tags in C
+    but creates a Python proxy per match, so the fallback-only tags are
+    collected by a second traversal only if a fallback is reached.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        super().__init__(classify_elements(root, _PRIMARY if is_lxml_element(root) else _COLLECTED))
+
+    def __missing__(self, name: str) -> List:
+        self.update(classify_elements(self.root, _FALLBACK))
+        return self[name]
+
+
+class BucketLookups:
+    """
+    Field lookups below the collected containers, in the same order
+    ElementPath's ``.//`` searches over the whole document would produce.
+    """
+
+    def __init__(self, root):
+        self.found = _Buckets(root)
+
+    def title(self) -> Optional[str]:
+        """Same strategy order as ``extract_title_from_tei``."""
+        found = self.found
+        for container, path in (
+            ('titleStmt', 'tei:title[@type="main"]'),
+            ('titleStmt', 'tei:title'),
+            ('analytic', 'tei:title[@type="main"]'),
+            ('analytic', 'tei:title'),
+        ):
+            title = extract_text_from_element(_first_child(found[container], path))
+            if title:
+                return title
+
+        for bibl in found['biblStruct']:
+            main_titles = _find_all(bibl, './/tei:title[@type="main"]')
+            if main_titles:
+                title_elem = main_titles[0]
+                title = extract_text_from_element(title_elem)
+                if title:
+                    return title
+                break
+
+        return _long_title(found['title'])
+
+    def authors(self) -> List:
+        for container in ('sourceDesc', 'analytic', 'biblStruct'):
+            authors = _descendants(self.found[container], './/tei:author')
+            if authors:
+                return authors
+        return []
+
+    def abstract(self):
+        found = self.found
+        abstract_elem = _first_child(found['profileDesc'], 'tei:abstract/tei:div/tei:p')
+        if abstract_elem is None:
+            abstract_elem = _first_child(found['profileDesc'], 'tei:abstract/tei:p')
+        if abstract_elem is None:
+            abstract_elem = _first_child(found['abstract'], 'tei:p')
+        return abstract_elem
+
+    def keyword_terms(self) -> List:
+        return _descendants(self.found['keywords'], 'tei:term')
+
+    def affiliations(self) -> List:
+        return self.found['affiliation']
+
+    def publication_date(self):
+        return _first_child(self.found['publicationStmt'], 'tei:date')
+
+    def body(self):
+        return _first_child(self.found['text'], 'tei:body')
+
+
+def _long_title(titles) -> Optional[str]:
+    # Last resort: the first title long enough to be a paper title
+    for title_elem in titles:
+        title = extract_text_from_element(title_elem)
+        if title and len(title) > 10:
+            return title
+    return None
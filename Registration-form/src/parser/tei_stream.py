@@ -0,0 +1,140 @@
+"""
+TEI parsed while it downloads from GROBID
+"""
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+import requests
+
+from .tei_backend import PARSE_ERRORS, TeiPullParser
+from .tei_document import BODY_TEXT_LIMIT, TeiDocument
+
+# Bytes read from the response (and fed to the parser) at a time
+STREAM_CHUNK_SIZE = 16 * 1024
+
+
+class TeiStream:
+    """
+    A GROBID TEI response parsed incrementally as its chunks arrive.
+
+    Each chunk is fed to a pull parser as soon as it has been read, so
+    parsing overlaps the network transfer instead of starting after it,
+    and ``header()`` returns once </teiHeader> is in: the body and the
+    reference list may still be downloading, or never be downloaded at
+    all if the caller then closes the stream.
+
+    Closing before the end drops the connection instead of returning it
+    to the pool, which is cheaper than downloading the rest of a large
+    TEI. Network errors while reading (e.g. a connection reset) are
+    raised from the method that was reading.
+
+    Use as a context manager, or call ``close()``.
+
+    Args:
+        chunks: The TEI in order, as str or bytes pieces
+        close: Called by ``close()``, e.g. to close the HTTP response
+        on_complete: Called with the TEI string once it has been read to
+            the end, e.g. to cache it
+        body_text_limit: Passed on to the ``TeiDocument`` objects returned
+    """
+
+    def __init__(self, chunks: Iterable[Union[str, bytes]], close: Optional[Callable[[], None]] = None,
+                 on_complete: Optional[Callable[[str], None]] = None,
+                 body_text_limit: Optional[int] = BODY_TEXT_LIMIT):
+        self._chunks: Iterator = iter(chunks)
+        self._close = close
+        self._on_complete = on_complete
+        self.body_text_limit = body_text_limit
+        self._parser = TeiPullParser()
+        self._pieces: List[Union[str, bytes]] = []
+        self._text: Optional[str] = None
+        self._root = None
+        self.parse_error: Optional[Exception] = None
+        self.complete = False
+        self.closed = False
+
+    @classmethod
+    def from_response(cls, response: requests.Response, chunk_size: int = STREAM_CHUNK_SIZE,
+                      **kwargs) -> 'TeiStream':
+        """Stream a ``requests`` response sent with ``stream=True``."""
+        return cls(response.iter_content(chunk_size), close=response.close, **kwargs)
+
+    @classmethod
+    def from_text(cls, tei_xml: str, chunk_size: int = STREAM_CHUNK_SIZE, **kwargs) -> 'TeiStream':
+        """Stream TEI that is already in memory (e.g. a cache hit)."""
+        stream = cls((tei_xml[offset:offset + chunk_size] for offset in range(0, len(tei_xml), chunk_size)),
+                     **kwargs)
+        stream._text = tei_xml
+        return stream
+
+    def _read(self, until_header: bool = False):
+        """Read and parse chunks until the header is parsed (if asked) or the TEI ends."""
+        if self.closed and not self.complete:
+            raise ValueError("TEI stream was closed before it was read to the end")
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            if self._text is None:
+                self._pieces.append(chunk)
+            if self.parse_error is None:
+                try:
+                    self._parser.feed(chunk)
+                except PARSE_ERRORS as e:
+                    # Keep downloading so text() still returns what GROBID sent
+                    self.parse_error = e
+            if until_header and self._parser.header is not None:
+                return
+
+        if self.complete:
+            return
+        self.complete = True
+        if self.parse_error is None:
+            try:
+                self._root = self._parser.close()
+            except PARSE_ERRORS as e:
+                self.parse_error = e
+        if self._on_complete is not None:
+            self._on_complete(self.text())
+
+    def header(self) -> TeiDocument:
+        """
+        The document's <teiHeader> as a ``TeiDocument``, read only as far as
+        needed (same fields as ``extract_metadata_from_tei(..., header_only=True)``).
+        Without a teiHeader, the whole document is read and returned.
+        """
+        if self._parser.header is None and not self.complete:
+            self._read(until_header=True)
+        if self._parser.header is not None:
+            return TeiDocument.from_root(self._parser.header, body_text_limit=self.body_text_limit)
+        return self.document()
+
+    def document(self) -> TeiDocument:
+        """Read the rest of the TEI and return the whole document, parsed once."""
+        self._read()
+        return TeiDocument.from_root(self._root, body_text_limit=self.body_text_limit,
+                                     parse_error=self.parse_error)
+
+    def text(self) -> str:
+        """Read the rest of the TEI and return it as a string."""
+        self._read()
+        if self._text is None:
+            if self._pieces and isinstance(self._pieces[0], bytes):
+                # GROBID sends UTF-8, which is also the XML default
+                self._text = b''.join(self._pieces).decode('utf-8', errors='replace')
+            else:
+                self._text = ''.join(self._pieces)
+            self._pieces = []
+        return self._text
+
+    def close(self):
+        """Stop reading; the unread rest of the response is discarded."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._close is not None:
+            self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,184 @@
+"""
+Long-lived Tesseract engines for receipt OCR
+"""
+import importlib.util
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import pytesseract
+from PIL import Image
+
+TESSERACT_WORKERS = int(os.environ.get("TESSERACT_WORKERS", "2"))
+# OCR threads across all engines, so concurrent sessions share the CPU
+# instead of each engine starting one thread per core
+OCR_THREAD_LIMIT = int(os.environ.get("OCR_THREAD_LIMIT", "0")) or os.cpu_count() or 1
+TESSERACT_LANG = os.environ.get("TESSERACT_LANG", "eng")
+
+# Detected without importing: libtesseract must only be loaded in the
+# workers, after their thread limit is set
+TESSEROCR_AVAILABLE = importlib.util.find_spec("tesserocr") is not None
+
+# Where distribution packages (tesseract-ocr-eng, Homebrew) put the
+# language data; the tesserocr wheels bundle a libtesseract that only
+# looks in TESSDATA_PREFIX
+_TESSDATA_DIRS = (
+    '/usr/share/tesseract-ocr/5/tessdata',
+    '/usr/share/tesseract-ocr/4.00/tessdata',
+    '/usr/share/tessdata',
+    '/usr/local/share/tessdata',
+    '/opt/homebrew/share/tessdata',
+)
+
+# The engine of this worker process
+_api = None
+
+
+def tessdata_path(lang: str = TESSERACT_LANG) -> Optional[str]:
+    """
+    The directory with `lang`'s traineddata for tesserocr: None when
+    TESSDATA_PREFIX is set (libtesseract reads it), else the first
+    distribution directory that has it.
+    """
+    if os.environ.get('TESSDATA_PREFIX'):
+        return None
+    return next((path for path in _TESSDATA_DIRS if os.path.exists(os.path.join(path, f'{lang}.traineddata'))),
+                None)
+
+
+def _start_engine(thread_limit: int, lang: str):
+    """Worker initializer: load the engine (and eng.traineddata) once."""
+    global _api
+    # Read by OpenMP when libtesseract loads
+    os.environ['OMP_THREAD_LIMIT'] = str(thread_limit)
+    import tesserocr
+
+    path = tessdata_path(lang)
+    _api = tesserocr.PyTessBaseAPI(lang=lang) if path is None else tesserocr.PyTessBaseAPI(path=path, lang=lang)
+
+
+def _recognize(image: Image.Image) -> str:
+    _api.SetImage(image)
+    return _api.GetUTF8Text()
+
+
+def _ready() -> bool:
+    return _api is not None
+
+
+class TesseractPool:
+    """
+    Tesseract engines kept loaded in `workers` long-lived processes.
+
+    ``pytesseract.image_to_string`` writes every image to a temporary file
+    and starts a new ``tesseract`` process, which loads eng.traineddata
+    again. With tesserocr installed, each worker process loads the engine
+    once and images reach it over the pool's pipe. Without it, pytesseract
+    is used as before, but at most `workers` at a time.
+
+    Either way each engine gets ``thread_limit // workers`` OpenMP threads
+    (OMP_THREAD_LIMIT), so all OCR together uses at most `thread_limit`.
+    """
+
+    def __init__(self, workers: int = TESSERACT_WORKERS, thread_limit: int = OCR_THREAD_LIMIT,
+                 lang: str = TESSERACT_LANG):
+        self.workers = max(1, workers)
+        self.threads_per_engine = max(1, thread_limit // self.workers)
+        self.lang = lang
+        # Cleared if the engines cannot be started: pytesseract from then on
+        self.use_engines = TESSEROCR_AVAILABLE
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._subprocess_slots = threading.BoundedSemaphore(self.workers)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            # Another thread may have given up on the engines meanwhile
+            if not self.use_engines:
+                raise BrokenProcessPool("Tesseract workers are disabled")
+            if self._executor is None:
+                # Not fork: a forked worker would inherit the app's threads'
+                # locks and any OpenMP runtime already loaded by the parent,
+                # which ignores the OMP_THREAD_LIMIT set in _start_engine
+                methods = multiprocessing.get_all_start_methods()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_start_engine,
+                    initargs=(self.threads_per_engine, self.lang),
+                    mp_context=multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                )
+            return self._executor
+
+    def warm_up(self, background: bool = False):
+        """
+        Start the workers and load their engines now instead of on the first
+        receipt. With `background`, return at once.
+        """
+        if not self.use_engines or self._executor is not None:
+            return
+        try:
+            executor = self._get_executor()
+        except BrokenProcessPool:
+            return
+        futures = [executor.submit(_ready) for _ in range(self.workers)]
+        if not background:
+            for future in futures:
+                future.result()
+
+    def image_to_string(self, image: Image.Image) -> str:
+        """
+        The text Tesseract reads in `image`. tesserocr returns the page text
+        without the trailing form feed the command line may add.
+        """
+        if self.use_engines:
+            try:
+                return self._get_executor().submit(_recognize, image).result()
+            except BrokenProcessPool as e:
+                # An engine failed to load or a worker died
+                print(f"⚠️ Tesseract workers failed, using the tesseract command instead: {e}")
+                with self._lock:
+                    self.use_engines = False
+                    if self._executor is not None:
+                        self._executor.shutdown(wait=False)
+                    self._executor = None
+        return self._image_to_string_subprocess(image)
+
+    def _image_to_string_subprocess(self, image: Image.Image) -> str:
+        """``pytesseract.image_to_string``, with this pool's thread limit for the tesseract process only."""
+        command = [pytesseract.pytesseract.tesseract_cmd]
+        env = {**os.environ, 'OMP_THREAD_LIMIT': str(self.threads_per_engine)}
+        with self._subprocess_slots, pytesseract.pytesseract.save(image) as (_, input_path):
+            command += [input_path, 'stdout', '-l', self.lang]
+            try:
+                result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, env=env)
+            except FileNotFoundError:
+                raise pytesseract.TesseractNotFoundError()
+        if result.returncode:
+            raise pytesseract.TesseractError(result.returncode, pytesseract.pytesseract.get_errors(result.stderr))
+        return result.stdout.decode('utf-8')
+
+    def close(self):
+        """Stop the engines; a later call starts them again."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+            self._executor = None
+
+
+_default_pool: Optional[TesseractPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_tesseract_pool() -> TesseractPool:
+    """
+    Return the process-wide Tesseract pool (configured via TESSERACT_WORKERS,
+    OCR_THREAD_LIMIT and TESSERACT_LANG).
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = TesseractPool()
+    return _default_pool
@@ -0,0 +1,110 @@
+"""
+Content-addressed cache for text extracted from PDFs
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from ..utils.disk_cache import DiskCache, hash_bytes
+from ..utils.pdf_source import PdfSource, sha256_of
+
+
+DEFAULT_TEXT_CACHE_MEMORY_MB = int(os.environ.get("TEXT_CACHE_MEMORY_MB", "64"))
+# Empty: memory only
+DEFAULT_TEXT_CACHE_DIR = os.environ.get("TEXT_CACHE_DIR", "")
+DEFAULT_TEXT_CACHE_MAX_MB = int(os.environ.get("TEXT_CACHE_MAX_MB", "256"))
+
+
+class TextCache:
+    """
+    Caches the full text of PDFs keyed by the SHA-256 of the PDF bytes plus
+    the extractor backend (and its version) that produced it.
+
+    Streamlit reruns and repeated "Auto-Fill" clicks on the same upload
+    then cost a hash and a dictionary lookup instead of extracting every
+    page again. Recently used texts are kept in memory up to a size cap;
+    with a directory, texts are also stored zlib-compressed on disk (with
+    LRU eviction) and survive restarts.
+    """
+
+    def __init__(self, memory_mb: int = DEFAULT_TEXT_CACHE_MEMORY_MB,
+                 directory: Optional[str] = DEFAULT_TEXT_CACHE_DIR or None,
+                 max_mb: int = DEFAULT_TEXT_CACHE_MAX_MB):
+        self.max_memory_bytes = memory_mb * 1024 * 1024
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.store = DiskCache(directory, max_bytes=max_mb * 1024 * 1024) if directory else None
+
+    @staticmethod
+    def digest(pdf: PdfSource) -> str:
+        """SHA-256 of the PDF content (pass it back as ``digest=`` to skip rehashing)."""
+        return sha256_of(pdf)
+
+    @staticmethod
+    def make_key(pdf_digest: str, backend: str) -> str:
+        """Build the cache key for one PDF's text from one backend, e.g. "PyMuPDF 1.24.1"."""
+        return hash_bytes(f"{pdf_digest}|{backend}".encode('utf-8'))
+
+    def get(self, pdf: PdfSource, backend: str, digest: Optional[str] = None) -> Optional[str]:
+        """Return the cached text of this PDF from this backend, or None."""
+        key = self.make_key(digest or self.digest(pdf), backend)
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                return text
+        if self.store is None:
+            return None
+        data = self.store.get(key)
+        if data is None:
+            return None
+        text = data.decode('utf-8')
+        self._remember(key, text)
+        return text
+
+    def put(self, pdf: PdfSource, backend: str, text: str, digest: Optional[str] = None):
+        """Store the text this backend extracted from this PDF."""
+        key = self.make_key(digest or self.digest(pdf), backend)
+        self._remember(key, text)
+        if self.store is not None:
+            self.store.put(key, text.encode('utf-8'))
+
+    def _remember(self, key: str, text: str):
+        size = sys.getsizeof(text)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= sys.getsizeof(previous)
+            self._memory[key] = text
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= sys.getsizeof(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.store is not None:
+            self.store.clear()
+
+
+_default_cache: Optional[TextCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_text_cache() -> TextCache:
+    """
+    Return the process-wide text cache (configured via TEXT_CACHE_MEMORY_MB,
+    TEXT_CACHE_DIR and TEXT_CACHE_MAX_MB).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TextCache()
+    return _default_cache
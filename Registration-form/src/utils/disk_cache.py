@@ -0,0 +1,136 @@
+# src/utils/disk_cache.py
+
+import hashlib
+import os
+import threading
+import zlib
+from typing import Optional
+
+
+def hash_bytes(data: bytes) -> str:
+    """
+    Returns the SHA-256 hex digest of a byte buffer.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class DiskCache:
+    """
+    Compressed key/value store on disk with LRU eviction over a size cap.
+
+    Each entry is one zlib-compressed file named after its key. Reads bump
+    the file's mtime, so eviction simply drops the oldest files first.
+    All errors are swallowed: a broken cache must never break extraction.
+    """
+
+    SUFFIX = '.z'
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, compress_level: int = 6):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except OSError as e:
+            # Every read then misses and every write fails, both quietly
+            print(f"⚠️ Cache directory {directory} unavailable: {e}")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the decompressed value for `key`, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = zlib.decompress(f.read())
+            os.utime(path)  # mark as most recently used
+            return data
+        except FileNotFoundError:
+            return None
+        except (OSError, zlib.error) as e:
+            print(f"⚠️ Cache read failed for {key}: {e}")
+            return None
+
+    def put(self, key: str, value: bytes):
+        """
+        Stores `value` under `key`, evicting least recently used entries
+        when the cache grows past `max_bytes`.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            compressed = zlib.compress(value, self.compress_level)
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)  # atomic: readers never see partial entries
+        except OSError as e:
+            print(f"⚠️ Cache write failed for {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(compressed) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+        with self._lock:
+            for entry in self._entries():
+                try:
+                    os.unlink(entry.path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def _entries(self):
+        try:
+            return [e for e in os.scandir(self.directory) if e.name.endswith(self.SUFFIX)]
+        except OSError:
+            return []
+
+    def _scan_size(self) -> int:
+        total = 0
+        for entry in self._entries():
+            try:
+                total += entry.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _evict(self):
+        # Rescan so entries written by other processes are accounted for
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+        self._total_bytes = total
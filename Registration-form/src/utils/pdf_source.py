@@ -0,0 +1,60 @@
+# src/utils/pdf_source.py
+
+import hashlib
+import os
+from typing import BinaryIO, Optional, Union
+
+# Anything a PDF can be handed over as: a path, raw bytes, a buffer view
+# or a binary file-like object (e.g. a Streamlit UploadedFile)
+PdfSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+
+def is_path(pdf: PdfSource) -> bool:
+    """
+    True if `pdf` names a file on disk rather than holding PDF content.
+    """
+    return isinstance(pdf, (str, os.PathLike))
+
+
+def as_buffer(pdf: PdfSource) -> Optional[memoryview]:
+    """
+    Returns a zero-copy memoryview over in-memory PDF content, or None for paths.
+
+    BytesIO-style objects (including Streamlit uploads) expose their internal
+    buffer via getbuffer(); other file-like objects are read once.
+    """
+    if is_path(pdf):
+        return None
+    if isinstance(pdf, memoryview):
+        return pdf
+    if isinstance(pdf, (bytes, bytearray)):
+        return memoryview(pdf)
+    if hasattr(pdf, 'getbuffer'):
+        return pdf.getbuffer()
+    if hasattr(pdf, 'seek'):
+        pdf.seek(0)
+    return memoryview(pdf.read())
+
+
+def pdf_size(pdf: PdfSource) -> int:
+    """
+    Returns the size of the PDF in bytes without reading a file into memory.
+    """
+    if is_path(pdf):
+        return os.path.getsize(pdf)
+    return as_buffer(pdf).nbytes
+
+
+def sha256_of(pdf: PdfSource, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Returns the SHA-256 hex digest of the PDF content. Files are hashed in
+    chunks so they never have to be loaded whole.
+    """
+    digest = hashlib.sha256()
+    if is_path(pdf):
+        with open(pdf, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    else:
+        digest.update(as_buffer(pdf))
+    return digest.hexdigest()